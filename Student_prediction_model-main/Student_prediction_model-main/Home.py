@@ -1,6 +1,9 @@
 import streamlit as st
 import os
 from custom_nav import main as custom_nav_main
+from data.utils.assets import image_src
+from data.utils.metrics import count_rerun
+from data.utils.resources import start_warmup
 
 # Configure the page
 st.set_page_config(
@@ -8,6 +11,10 @@ st.set_page_config(
     page_icon="📚",
     layout="centered"
 )
+count_rerun("Home")
+
+# Load heavy libraries, sample data and the model in the background while users log in
+start_warmup()
 
 # Hide the default sidebar and the navigation icon
 st.markdown(
@@ -26,7 +33,8 @@ st.markdown(
 
 # Display logo if available
 if os.path.exists("data/logo.png"):
-    st.image("data/logo.png", width=200, use_container_width=False)
+    # Served as a small WebP thumbnail instead of the full-size PNG
+    st.image(image_src("data/logo.png", 200), width=200)
     
 # Main title
 st.title("Student Prediction System")
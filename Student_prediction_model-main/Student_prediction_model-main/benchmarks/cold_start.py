@@ -0,0 +1,116 @@
+# benchmarks/cold_start.py
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Written by the app on first use; a cold start begins without any of them
+GENERATED_DIRS = ["data/cache", "data/db", "data/models"]
+# Seconds to wait for the warm-up thread once the pages have run
+WARMUP_TIMEOUT = 300
+# Seconds AppTest waits for one page run
+PAGE_TIMEOUT = 120
+
+
+def _ignore_generated(root):
+    def ignore(directory, names):
+        relative = os.path.relpath(directory, root)
+        return [name for name in names
+                if name == "__pycache__" or os.path.normpath(os.path.join(relative, name)) in GENERATED_DIRS]
+    return ignore
+
+
+def _run_page(path, session_state=None, action=None):
+    # Returns the exceptions the page raised, after action (a function of the AppTest) if given
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.abspath(path), default_timeout=PAGE_TIMEOUT)
+    for key, value in (session_state or {}).items():
+        at.session_state[key] = value
+    at.run()
+    if action is not None and not at.exception:
+        action(at)
+    return [f"{path}: {exception.value}" for exception in at.exception]
+
+
+def _train_model(at):
+    # Saves a model artifact while the warm-up may be training and saving its own
+    [box for box in at.selectbox if box.label == "Prediction Method"][0].select("Linear Regression").run()
+    [button for button in at.button if button.label == "Train Model"][0].click().run()
+
+
+def check_cold_start():
+    """Run the entry and input pages while the warm-up they start is still running, in the current
+    directory, and return a list of failures (page exceptions, a warm-up error, stray temp files).
+    """
+    from data.utils.resources import start_warmup
+
+    failures = []
+    # Home.py starts the warm-up; the pages after it race it for thumbnails, the sample data,
+    # the student database and the regression model
+    failures += _run_page("Home.py")
+    failures += _run_page("pages/Student_Login.py")
+    failures += _run_page("pages/Student_Input.py", {"student_id": "S001", "student_name": "Cold Start"})
+    failures += _run_page("pages/Teacher_Input.py", {"teacher_id": "T001", "is_admin": True}, _train_model)
+
+    status = start_warmup()
+    deadline = time.time() + WARMUP_TIMEOUT
+    while status["seconds"] is None and time.time() < deadline:
+        time.sleep(0.1)
+    if status["seconds"] is None:
+        failures.append(f"warm-up: still running after {WARMUP_TIMEOUT} s")
+    elif status["error"]:
+        failures.append(f"warm-up: {status['error']}")
+
+    for directory, _, names in os.walk("data"):
+        failures += [f"left behind: {os.path.join(directory, name)}" for name in names if name.endswith(".tmp")]
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Start the app on empty caches, the way a fresh deployment does, and fail if a page "
+                    "or the background warm-up raises.")
+    parser.add_argument("--rounds", type=int, default=3, help="cold starts to run, each in a fresh copy")
+    parser.add_argument("--in-place", action="store_true",
+                        help="run one round in the current directory (used by the rounds themselves)")
+    args = parser.parse_args()
+
+    if args.in_place:
+        failures = check_cold_start()
+        for failure in failures:
+            print(failure, file=sys.stderr)
+        sys.exit(1 if failures else 0)
+
+    # Each round runs in a copy of the app without its generated files, in a fresh interpreter,
+    # so neither the caches on disk nor the ones in memory are warm
+    root = os.getcwd()
+    failed_rounds = 0
+    for round_number in range(1, args.rounds + 1):
+        with tempfile.TemporaryDirectory(prefix="cold-start-") as tmp_dir:
+            app_dir = os.path.join(tmp_dir, "app")
+            shutil.copytree(root, app_dir, ignore=_ignore_generated(root))
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, "-m", "benchmarks.cold_start", "--in-place"], cwd=app_dir,
+                                    env={**os.environ, "PYTHONPATH": app_dir}, capture_output=True, text=True)
+            elapsed = time.perf_counter() - start
+        failures = [line for line in result.stderr.splitlines()
+                    if line and "missing ScriptRunContext" not in line and "No runtime found" not in line]
+        if result.returncode:
+            failed_rounds += 1
+            print(f"Round {round_number}: FAILED after {elapsed:.1f} s")
+            for line in failures:
+                print(f"    {line}")
+        else:
+            print(f"Round {round_number}: OK ({elapsed:.1f} s)")
+
+    if failed_rounds:
+        sys.exit(f"{failed_rounds} of {args.rounds} cold starts failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/import_budget.py
+
+import argparse
+import ast
+import glob
+import json
+import os
+import subprocess
+import sys
+
+BUDGET_PATH = "benchmarks/import_budget.json"
+PAGES = ["Home.py"] + sorted(glob.glob("pages/*.py"))
+# Streamlit is already loaded by the server before any page runs, so only imports after it count
+BASELINE_IMPORTS = "import streamlit"
+# Measured time is multiplied by this when writing a new budget, to absorb run-to-run noise
+BUDGET_HEADROOM = 1.5
+# Smallest budget written, so near-zero pages don't fail on timer jitter
+BUDGET_FLOOR_MS = 25
+
+
+def page_imports(path):
+    """Return the module-level import statements of a page as source code."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    statements = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(node) for node in statements)
+
+
+def parse_importtime(stderr):
+    """Return [(module, cumulative_us)] for the top-level imports in python -X importtime output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented under the module that triggered them
+        if name.strip() and not name[1:].startswith(" ") and cumulative.strip().isdigit():
+            modules.append((name.strip(), int(cumulative)))
+    return modules
+
+
+def measure_page(path):
+    """Milliseconds spent importing a page's modules on top of streamlit, in a fresh interpreter.
+
+    Returns (total_ms, slowest) where slowest lists the five slowest top-level modules.
+    """
+    code = f"{BASELINE_IMPORTS}\n{page_imports(path)}"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    modules = parse_importtime(result.stderr)
+    # Everything up to and including the streamlit import is the baseline
+    names = [name for name, _ in modules]
+    start = names.index("streamlit") + 1 if "streamlit" in names else 0
+    page_modules = modules[start:]
+    total_ms = sum(us for _, us in page_modules) / 1000
+    slowest = sorted(page_modules, key=lambda item: item[1], reverse=True)[:5]
+    return total_ms, [(name, us / 1000) for name, us in slowest]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check each page's import time against a budget.")
+    parser.add_argument("--budget", default=BUDGET_PATH, help="JSON file mapping page to milliseconds")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per page; the fastest counts")
+    parser.add_argument("--write", action="store_true",
+                        help=f"save the measured times x{BUDGET_HEADROOM} as the new budget")
+    args = parser.parse_args()
+
+    budget = {}
+    if os.path.exists(args.budget):
+        with open(args.budget) as f:
+            budget = json.load(f)
+
+    measured = {}
+    over_budget = []
+    for page in PAGES:
+        total_ms, slowest = min((measure_page(page) for _ in range(args.repeat)), key=lambda run: run[0])
+        measured[page] = total_ms
+        limit = budget.get(page)
+        status = "no budget" if limit is None else ("OK" if total_ms <= limit else "OVER")
+        if status == "OVER":
+            over_budget.append(page)
+        limit_text = f"{limit:.0f}" if limit is not None else "-"
+        print(f"{page:<28} {total_ms:8.1f} ms  (budget {limit_text} ms)  {status}")
+        for name, ms in slowest:
+            print(f"    {name:<40} {ms:8.1f} ms")
+
+    if args.write:
+        with open(args.budget, "w") as f:
+            json.dump({page: max(BUDGET_FLOOR_MS, round(ms * BUDGET_HEADROOM)) for page, ms in measured.items()}, f,
+                      indent=2)
+            f.write("\n")
+        print(f"Budget written to {args.budget}")
+    elif over_budget:
+        sys.exit(f"Over import-time budget: {', '.join(over_budget)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# benchmarks/run_benchmarks.py
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_ROWS = [1_000, 100_000, 1_000_000]
+CASES = [
+    "load_csv",             # validated, compacted upload parse (Teacher_Input "Upload Custom Data")
+    "score_formula",        # "Generate Predictions" with the Simple Formula
+    "score_linear",         # ... with Linear Regression
+    "score_student_model",  # ... with the Student Model
+    "class_stats",          # describe, correlations, histograms and counts of the dashboard
+    "factor_analysis",      # Teacher_Results correlation, rank correlation and coefficients
+    "figures",              # Teacher_Results distribution and factor charts, rendered to PNG
+]
+
+ROSTER_DIR = "data/cache/benchmarks"
+RESULTS_DIR = "benchmarks/results"
+SEED = 0
+DEFAULT_REPEAT = 3
+# Cases this many times slower than the baseline are flagged by --compare
+REGRESSION_RATIO = 1.2
+
+
+def roster_path(rows, seed=SEED):
+    """Path of the synthetic CSV roster with rows students, written the first time it is needed."""
+    from data.utils.synthetic import write_roster
+
+    path = os.path.join(ROSTER_DIR, f"synthetic-{rows}-seed{seed}.csv")
+    if not os.path.exists(path):
+        tmp_path = path + ".tmp"
+        write_roster(tmp_path, rows, seed=seed, fmt="csv")
+        os.replace(tmp_path, path)
+    return path
+
+
+def _scored(df):
+    from data.utils.ml_utils import predict_class_gpa
+
+    df = df.copy()
+    df["predicted_gpa"] = predict_class_gpa(df)
+    df["gpa_change"] = df["predicted_gpa"] - df["previous_gpa"]
+    return df
+
+
+def _linear_model():
+    from data.utils.data_loader import SAMPLE_DATA_PATH, read_student_csv
+    from data.utils.ml_utils import load_linear_model, train_linear_model
+
+    return load_linear_model() or train_linear_model(read_student_csv(SAMPLE_DATA_PATH))
+
+
+def prepare_case(case, path):
+    """Do the untimed setup of a case and return the function to time."""
+    from data.utils.data_loader import read_student_csv
+
+    if case == "load_csv":
+        from data.utils.ingest import stream_student_csv
+        return lambda: stream_student_csv(path)
+
+    df = read_student_csv(path)
+    if case == "score_formula":
+        from data.utils.ml_utils import predict_class_gpa
+        return lambda: predict_class_gpa(df)
+    if case == "score_linear":
+        from data.utils.ml_utils import predict_linear_gpa
+        model = _linear_model()
+        return lambda: predict_linear_gpa(df, model)
+    if case == "score_student_model":
+        from data.utils.ml_utils import predict_student_outcomes
+        return lambda: predict_student_outcomes(df)
+
+    df = _scored(df)
+    if case == "class_stats":
+        from data.utils.stats import compute_class_stats
+        return lambda: compute_class_stats(df)
+    if case == "factor_analysis":
+        from data.utils.factor_analysis import compute_factor_analysis
+        return lambda: compute_factor_analysis(df)
+    if case == "figures":
+        from data.utils.distribution import compute_distribution
+        from data.utils.factor_analysis import compute_factor_analysis
+        from data.utils.figures import factor_correlation_figure, figure_png, gpa_distribution_figure, load_pyplot
+
+        corr_df = compute_factor_analysis(df)
+        # Library imports are a one-off cost per process, kept out of the timing
+        load_pyplot()
+        import seaborn  # noqa: F401
+
+        def build_figures():
+            distributions = {column: compute_distribution(df[column].to_numpy(dtype="float64"))
+                             for column in ("previous_gpa", "predicted_gpa")}
+            figure_png(gpa_distribution_figure(distributions))
+            figure_png(factor_correlation_figure(corr_df))
+        return build_figures
+    raise ValueError(f"Unknown case: {case}")
+
+
+def _rss_mb():
+    # Process high-water mark in MB, or None where the Unix-only resource module is missing (Windows)
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _peak_label(peak_mb):
+    return f"{peak_mb:8.1f} MB peak" if peak_mb is not None else "     n/a MB peak"
+
+
+def run_case(case, rows, repeat=DEFAULT_REPEAT, seed=SEED):
+    """Time one case in this process and return its result as a dict.
+
+    peak_rss_mb is the process high-water mark after the timed runs; setup_rss_mb is the
+    mark before them, so the difference bounds the memory the case itself needed. Both are
+    None on platforms without the resource module.
+    """
+    fn = prepare_case(case, roster_path(rows, seed))
+    setup_rss = _rss_mb()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {
+        "case": case,
+        "rows": rows,
+        "repeat": repeat,
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "rows_per_s": rows / min(times) if min(times) > 0 else None,
+        "setup_rss_mb": setup_rss,
+        "peak_rss_mb": _rss_mb(),
+    }
+
+
+def _run_child(case, rows, repeat, seed):
+    # Each case runs in a fresh interpreter so its peak RSS and import state are its own
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run_benchmarks", "--child", case, "--rows", str(rows),
+         "--repeat", str(repeat), "--seed", str(seed)],
+        capture_output=True, text=True)
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines() or [f"exit code {result.returncode}"]
+        return {"case": case, "rows": rows, "error": lines[-1]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print the change of each case's min time against a previous results file."""
+    with open(baseline_path) as f:
+        baseline = {(r["case"], r["rows"]): r for r in json.load(f)["results"] if "error" not in r}
+    print(f"\nChange against {baseline_path}:")
+    for r in results:
+        before = baseline.get((r["case"], r["rows"]))
+        if before is None or "error" in r:
+            continue
+        ratio = r["min_s"] / before["min_s"] if before["min_s"] else float("inf")
+        flag = "  SLOWER" if ratio > REGRESSION_RATIO else ""
+        memory = ("" if r["peak_rss_mb"] is None or before["peak_rss_mb"] is None
+                  else f"  {r['peak_rss_mb'] - before['peak_rss_mb']:+8.1f} MB peak")
+        print(f"  {r['case']:<20} {r['rows']:>10,}  {ratio:6.2f}x time{memory}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time load, scoring, aggregation and chart rendering.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="roster sizes")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per case")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output", help=f"results file (default: a timestamped file in {RESULTS_DIR})")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--child", choices=CASES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_case(args.child, args.rows[0], args.repeat, args.seed)))
+        return
+
+    results = []
+    for rows in args.rows:
+        roster_path(rows, args.seed)
+        for case in args.cases:
+            r = _run_child(case, rows, args.repeat, args.seed)
+            results.append(r)
+            if "error" in r:
+                print(f"{case:<20} {rows:>10,}  ERROR {r['error']}")
+            else:
+                print(f"{case:<20} {rows:>10,}  {r['min_s'] * 1000:10.1f} ms  {_peak_label(r['peak_rss_mb'])}")
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"benchmarks-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,13 @@ def main():
         st.title("Navigation")
         choice = st.radio("Go to", list(pages.keys()))
 
+    # Only navigate when the selection changes; switching to the selected page on every run
+    # would make the page that shows the menu switch to itself and rerun forever
+    previous_choice = st.session_state.get("nav_choice", choice)
+    st.session_state.nav_choice = choice
+    if choice == previous_choice:
+        return
+
     # Set query parameters using the modern API
     st.query_params.update({"page": choice})
 
@@ -0,0 +1,127 @@
+# data/utils/assets.py
+
+import argparse
+import base64
+import glob
+import hashlib
+import io
+import os
+import threading
+
+import streamlit as st
+
+from data.utils.files import atomic_write, file_digest
+
+THUMBNAIL_CACHE_DIR = "data/cache/thumbs"
+
+# Thumbnails are rendered at this multiple of their display width so they stay sharp on HiDPI screens
+PIXEL_DENSITY = 2
+
+# Display width in CSS pixels of every image the pages show, used to pre-build thumbnails
+ASSET_WIDTHS = {
+    "data/logo.png": 200,
+    "data/Sau.jpg": 150,
+    "data/Pri.jpg": 150,
+    "data/Ankita.jpg": 150,
+    "data/Sujoy.jpg": 150,
+}
+
+WEBP_QUALITY = 80
+
+
+def _encode(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=6)
+    return buffer.getvalue()
+
+
+@st.cache_resource(show_spinner=False)
+def _build_lock(prefix):
+    # One lock per image and width, shared by the pages and the warm-up thread of a server process
+    return threading.Lock()
+
+
+def build_thumbnail(path, width):
+    """Write the WebP thumbnail of path at width CSS pixels, unless already on disk.
+
+    Files are named after the source's content hash, so replacing the image rebuilds the
+    thumbnail and removes the old one. Only one thread of a process builds a given image and
+    width at a time. Returns the thumbnail's path.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    path_key = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:8]
+    prefix = f"{stem}-{path_key}-{width}w"
+    thumb_path = os.path.join(THUMBNAIL_CACHE_DIR, f"{prefix}-{file_digest(path)}.webp")
+    if os.path.exists(thumb_path):
+        return thumb_path
+
+    with _build_lock(prefix):
+        # Another thread may have built it while this one waited
+        if os.path.exists(thumb_path):
+            return thumb_path
+
+        # Pillow ships with streamlit but is only needed when a thumbnail has to be made
+        from PIL import Image, ImageOps
+
+        with Image.open(path) as source:
+            image = ImageOps.exif_transpose(source)
+            pixel_width = min(width * PIXEL_DENSITY, image.width)
+            pixel_height = round(image.height * pixel_width / image.width)
+            image = image.resize((pixel_width, pixel_height), Image.Resampling.LANCZOS)
+
+        with atomic_write(thumb_path) as tmp_path, open(tmp_path, "wb") as f:
+            f.write(_encode(image))
+
+        # Drop thumbnails made from earlier versions of the same image, leaving files still being written
+        for stale_path in glob.glob(os.path.join(THUMBNAIL_CACHE_DIR, f"{prefix}-*")):
+            if stale_path != thumb_path and not stale_path.endswith(".tmp"):
+                try:
+                    os.remove(stale_path)
+                except FileNotFoundError:
+                    pass  # removed by another process cleaning up the same image
+    return thumb_path
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _cached_thumbnail(path, mtime_ns, size, width):
+    # The source's modification time and size are part of the key so an edited image is picked up
+    with open(build_thumbnail(path, width), "rb") as f:
+        return f.read()
+
+
+def thumbnail(path, width):
+    """Return the WebP bytes of path downscaled for display at width CSS pixels."""
+    stat = os.stat(path)
+    return _cached_thumbnail(path, stat.st_mtime_ns, stat.st_size, width)
+
+
+def image_src(path, width):
+    """Return the WebP thumbnail of path as a data URI, to show with st.image(..., width=width).
+
+    st.image re-encodes raw image bytes to JPEG or PNG and shrinks them to the display width,
+    decoding the image on every rerun; a data URI is sent to the browser exactly as built.
+    """
+    return "data:image/webp;base64," + base64.b64encode(thumbnail(path, width)).decode("ascii")
+
+
+def prepare_thumbnails(asset_widths=None):
+    """Build the thumbnails of every image in asset_widths (default ASSET_WIDTHS) that exists.
+
+    Returns {path: (source bytes, WebP bytes)} for the images that were prepared.
+    """
+    sizes = {}
+    for path, width in (asset_widths or ASSET_WIDTHS).items():
+        if os.path.exists(path):
+            sizes[path] = (os.path.getsize(path), os.path.getsize(build_thumbnail(path, width)))
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-build the thumbnails the pages serve.")
+    parser.parse_args()
+    for path, (source_bytes, webp_bytes) in prepare_thumbnails().items():
+        print(f"{path}: {source_bytes / 1024:,.0f} KB -> {webp_bytes / 1024:,.1f} KB WebP")
+
+
+if __name__ == "__main__":
+    main()
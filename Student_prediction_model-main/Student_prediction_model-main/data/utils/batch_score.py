@@ -0,0 +1,232 @@
+# data/utils/batch_score.py
+
+import argparse
+import io
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from data.utils.data_loader import coerce_student_frame
+from data.utils.files import file_format
+from data.utils.ingest import TEXT_DTYPES, check_required_columns, validate_chunk
+from data.utils.ml_utils import PREDICTION_METHODS, get_linear_model, predict_gpa
+
+# Command-line names of the Teacher page's prediction methods
+METHOD_OPTIONS = dict(zip(["formula", "linear", "student"], PREDICTION_METHODS))
+
+# CSV inputs are split into byte ranges of about this size, and into at least one range per
+# worker when they are big enough; a shard is parsed and scored in memory by one worker
+SHARD_BYTES = 64 * 1024 * 1024
+MIN_SHARD_BYTES = 1024 * 1024
+
+
+def output_path(path, output_dir=None):
+    """Where the scored copy of path is written: roster.csv -> roster.scored.csv."""
+    stem, ext = os.path.splitext(os.path.basename(path))
+    return os.path.join(output_dir or os.path.dirname(path), f"{stem}.scored{ext}")
+
+
+def plan_shards(path, workers, shard_bytes=SHARD_BYTES):
+    """Split a roster into shards that can be read independently.
+
+    CSV shards are ("csv", start, end) byte ranges of the data after the header; a shard owns
+    the lines that start inside its range, so rows never straddle two shards. Parquet shards
+    are ("parquet", row groups, first row) runs of consecutive row groups. The header is
+    checked for the required columns first.
+    """
+    if file_format(path) == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        check_required_columns(parquet_file.schema_arrow.names)
+        groups = parquet_file.num_row_groups
+        count = max(1, min(groups, workers))
+        shards, first_row = [], 0
+        for index in range(count):
+            run = list(range(groups * index // count, groups * (index + 1) // count))
+            shards.append(("parquet", run, first_row))
+            first_row += sum(parquet_file.metadata.row_group(group).num_rows for group in run)
+        return shards
+
+    with open(path, "rb") as f:
+        header = f.readline()
+    check_required_columns(pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist())
+    data_start, size = len(header), os.path.getsize(path)
+    data_bytes = size - data_start
+    count = max(1, min(max(workers, math.ceil(data_bytes / shard_bytes)), data_bytes // MIN_SHARD_BYTES))
+    bounds = [data_start + data_bytes * index // count for index in range(count + 1)]
+    return [("csv", start, end) for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def _line_number(path, offset):
+    # File line number of the line starting at byte offset; only needed for error messages
+    lines = 1
+    with open(path, "rb") as f:
+        while offset > 0:
+            block = f.read(min(offset, 1 << 20))
+            lines += block.count(b"\n")
+            offset -= len(block)
+    return lines
+
+
+def read_shard(path, shard):
+    """Read one shard of a roster as a validated frame in the student schema."""
+    if shard[0] == "parquet":
+        import pyarrow.parquet as pq
+
+        _, groups, first_row = shard
+        chunk = pq.ParquetFile(path).read_row_groups(groups).to_pandas()
+        # Parquet has no lines, so errors name the row number, counting from 1
+        validate_chunk(chunk, first_line=first_row + 1)
+        return coerce_student_frame(chunk)
+
+    _, start, end = shard
+    with open(path, "rb") as f:
+        header = f.readline()
+        if start > len(header):
+            # Skip the rest of the line running into the range; it belongs to the previous shard
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        data = f.read(end - position) if end > position else b""
+        if data and not data.endswith(b"\n"):
+            data += f.readline()
+
+    # Read the same way stream_student_csv reads uploads
+    chunk = pd.read_csv(io.BytesIO(header + data), keep_default_na=False, na_values=[""], dtype=TEXT_DTYPES)
+    try:
+        validate_chunk(chunk, first_line=0)
+    except ValueError:
+        # Counting the lines before the shard is only worth it to report where the error is
+        validate_chunk(chunk, first_line=_line_number(path, position))
+    return coerce_student_frame(chunk)
+
+
+def score_shard(path, shard, method, model, part_path):
+    """Score one shard and write it to part_path in the input's format.
+
+    Runs in a worker process. Returns (rows, column names).
+    """
+    chunk = read_shard(path, shard)
+    predicted_gpa = predict_gpa(chunk, method, model)
+    chunk["predicted_gpa"] = predicted_gpa
+    chunk["gpa_change"] = predicted_gpa - chunk["previous_gpa"].to_numpy(dtype="float64")
+    chunk = coerce_student_frame(chunk)
+    if shard[0] == "parquet":
+        chunk.to_parquet(part_path, index=False)
+    else:
+        chunk.to_csv(part_path, header=False, index=False)
+    return len(chunk), list(chunk.columns)
+
+
+def _merge_parts(part_paths, columns, output, fmt):
+    # Parts are joined in shard order under a temporary name, so the output is never half-written
+    tmp_path = output + ".tmp"
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for part_path in part_paths:
+                table = pq.read_table(part_path)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                # Categories differ between shards, so parts are cast to the first part's schema
+                writer.write_table(table.cast(writer.schema))
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        with open(tmp_path, "w", newline="") as out:
+            pd.DataFrame(columns=columns).to_csv(out, index=False)
+            for part_path in part_paths:
+                with open(part_path) as part:
+                    shutil.copyfileobj(part, out)
+    os.replace(tmp_path, output)
+
+
+def score_files(paths, method="Simple Formula", output_dir=None, workers=None, shard_bytes=SHARD_BYTES):
+    """Score every roster in paths with the Teacher page's method, spreading shards over workers.
+
+    Shards of all files share one process pool, so small files don't leave cores idle. Each
+    input gets a scored copy (see output_path) with predicted_gpa and gpa_change added.
+    Returns one dict per input with rows, shards, seconds and output, or error.
+    """
+    workers = workers or os.cpu_count() or 1
+    # Loaded (or trained) once here and sent to the workers, so every shard uses the same model
+    model = get_linear_model() if method == "Linear Regression" else None
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    summaries = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = []
+        for path in paths:
+            start = time.perf_counter()
+            output = output_path(path, output_dir)
+            try:
+                shards = plan_shards(path, workers, shard_bytes)
+            except (OSError, ValueError) as e:
+                jobs.append((path, output, start, None, None, None, e))
+                continue
+            parts_dir = tempfile.mkdtemp(prefix=".parts-", dir=os.path.dirname(output) or ".")
+            ext = os.path.splitext(output)[1]
+            part_paths = [os.path.join(parts_dir, f"{index:05d}{ext}") for index in range(len(shards))]
+            futures = [pool.submit(score_shard, path, shard, method, model, part_path)
+                       for shard, part_path in zip(shards, part_paths)]
+            jobs.append((path, output, start, parts_dir, part_paths, futures, None))
+
+        for path, output, start, parts_dir, part_paths, futures, error in jobs:
+            if error is None:
+                try:
+                    results = [future.result() for future in futures]
+                    _merge_parts(part_paths, results[0][1], output, file_format(path))
+                except (OSError, ValueError) as e:
+                    error = e
+                finally:
+                    shutil.rmtree(parts_dir, ignore_errors=True)
+            if error is not None:
+                summaries.append({"input": path, "error": str(error)})
+                continue
+            summaries.append({"input": path, "output": output, "rows": sum(rows for rows, _ in results),
+                              "shards": len(futures), "seconds": time.perf_counter() - start})
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score student rosters without the browser.")
+    parser.add_argument("inputs", nargs="+", help="CSV or Parquet rosters (.parquet/.pq) to score")
+    parser.add_argument("--method", choices=METHOD_OPTIONS, default="formula",
+                        help="prediction method, as on the Teacher page (default: formula)")
+    parser.add_argument("--output-dir", help="where to write the scored files (default: next to each input)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--shard-mb", type=int, default=SHARD_BYTES // (1024 * 1024),
+                        help="target size of a CSV shard in MB")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summaries = score_files(args.inputs, METHOD_OPTIONS[args.method], args.output_dir, args.workers,
+                            args.shard_mb * 1024 * 1024)
+    elapsed = time.perf_counter() - start
+    failed = False
+    for summary in summaries:
+        if "error" in summary:
+            failed = True
+            print(f"{summary['input']}: {summary['error']}", file=sys.stderr)
+        else:
+            print(f"{summary['input']} -> {summary['output']}: {summary['rows']:,} rows in {summary['shards']} "
+                  f"shards, {summary['seconds']:.1f} s")
+    rows = sum(summary.get("rows", 0) for summary in summaries)
+    print(f"Scored {rows:,} rows in {elapsed:.1f} s ({rows / elapsed:,.0f} rows/s)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
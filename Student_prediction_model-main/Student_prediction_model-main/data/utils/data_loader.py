@@ -0,0 +1,225 @@
+# data/utils/data_loader.py
+
+import glob
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional; without it every cache miss parses the CSV
+    feather = None
+
+from data.utils.files import atomic_write, file_digest
+
+SAMPLE_DATA_PATH = "data/sample_student_data.csv"
+PROFILES_DATA_PATH = "data/student_profiles.csv"
+
+# Feather copies of parsed CSVs, named after the source path, schema version and content hash
+COLUMNAR_CACHE_DIR = "data/cache/columnar"
+
+# Ordinal columns and their levels, lowest first
+ORDINAL_CATEGORIES = {
+    "class_participation": ["Low", "Medium", "High"],
+    "homework_completion": ["Low", "Medium", "High"],
+    "behavior_score": ["Poor", "Average", "Good", "Excellent"],
+    "extracurricular": ["None", "Limited", "Moderate", "Extensive"],
+    "stress_level": ["Very Low", "Low", "Medium", "High", "Very High"],
+}
+
+# Compact dtypes for every known student record column. Bump SCHEMA_VERSION when this changes
+# so Feather copies written with the old dtypes are not reused.
+SCHEMA_VERSION = 1
+STUDENT_SCHEMA = {
+    "student_id": "string",
+    "name": "string",
+    "age": "int8",
+    "gender": "category",
+    "attendance": "int8",
+    "study_hours": "float32",
+    "previous_gpa": "float32",
+    **{column: pd.CategoricalDtype(levels, ordered=True) for column, levels in ORDINAL_CATEGORIES.items()},
+    "sleep_hours": "int8",
+    "predicted_gpa": "float32",
+    "gpa_change": "float32",
+}
+
+# Maximum number of parsed files kept in memory at once
+MAX_CACHED_FILES = 8
+
+# Bytes per element of the int64/float64 columns and object pointers pandas uses by default
+DEFAULT_ITEM_SIZE = 8
+# Size of an empty str object; each ASCII character adds one byte
+EMPTY_STR_SIZE = sys.getsizeof("")
+
+
+def _is_integer_dtype(dtype):
+    return isinstance(dtype, str) and dtype.startswith("int")
+
+
+def read_student_csv(source):
+    """Parse a student CSV straight into the compact student schema.
+
+    Columns that are not part of the schema are left to pandas. Raises ValueError for values
+    the integer columns can't hold (see coerce_student_frame).
+    """
+    # Integer columns are parsed as pandas infers them and checked before the narrowing cast;
+    # only empty cells are missing values, as "None" is a valid extracurricular level
+    dtypes = {column: dtype for column, dtype in STUDENT_SCHEMA.items() if not _is_integer_dtype(dtype)}
+    return coerce_student_frame(pd.read_csv(source, dtype=dtypes, keep_default_na=False, na_values=[""]))
+
+
+def check_integer_columns(df, dtypes):
+    """Raise ValueError for the first value of df that the integer dtype of its column can't hold.
+
+    Fractional, out-of-range and missing values are all rejected, so casting never truncates
+    or wraps a value (7.5 sleep hours to 7, age 200 to -56).
+    """
+    for column, dtype in dtypes.items():
+        if not _is_integer_dtype(dtype):
+            continue
+        info = np.iinfo(dtype)
+        values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        # NaN fails every comparison, so missing and non-numeric cells are caught too
+        invalid = ~((values == np.round(values)) & (values >= info.min) & (values <= info.max))
+        if invalid.any():
+            row = int(np.argmax(invalid))
+            if np.isnan(values[row]):
+                raise ValueError(f"Missing or non-numeric {column} in record {row + 1}.")
+            expected = "a whole number" if values[row] != np.round(values[row]) else f"at most {info.max}"
+            if values[row] < info.min:
+                expected = f"at least {info.min}"
+            raise ValueError(f"Invalid {column} '{df[column].iloc[row]}' in record {row + 1}. Expected {expected}.")
+
+
+def coerce_student_frame(df):
+    """Cast the known columns of an already loaded frame to the student schema.
+
+    Labels outside an ordinal column's levels become missing values. Values an integer column
+    can't hold raise ValueError instead of being truncated.
+    """
+    dtypes = {column: dtype for column, dtype in STUDENT_SCHEMA.items()
+              if column in df.columns and df[column].dtype != dtype}
+    check_integer_columns(df, dtypes)
+    return df.astype(dtypes) if dtypes else df
+
+
+def memory_report(df):
+    """Return the frame's in-memory size next to an estimate of the same data with default dtypes.
+
+    The estimate assumes what a plain pd.read_csv produces: 8-byte numbers and one
+    Python str object per text cell. It is computed from category counts and string
+    lengths, so no object-dtype copy is ever built.
+    """
+    default_bytes = 0
+    for column in df.columns:
+        values = df[column]
+        default_bytes += DEFAULT_ITEM_SIZE * len(values)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            counts = values.value_counts(sort=False)
+            default_bytes += int((counts * (EMPTY_STR_SIZE + counts.index.astype(str).str.len())).sum())
+        elif not pd.api.types.is_numeric_dtype(values):
+            default_bytes += int((EMPTY_STR_SIZE + values.astype("string").str.len().fillna(0)).sum())
+    return {
+        "rows": len(df),
+        "bytes": int(df.memory_usage(index=False, deep=True).sum()),
+        "default_dtype_bytes": default_bytes,
+    }
+
+
+def read_student_file(path):
+    """Load a student CSV through its Feather copy, converting the CSV the first time it is seen.
+
+    The copy is rebuilt whenever the CSV's content hash changes. Categorical columns are
+    stored as Arrow dictionaries, so later loads skip text parsing entirely.
+    """
+    if feather is None:
+        return read_student_csv(path)
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    path_key = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:8]
+    cache_name = f"{stem}-{path_key}-v{SCHEMA_VERSION}-{file_digest(path)}.feather"
+    cache_path = os.path.join(COLUMNAR_CACHE_DIR, cache_name)
+
+    if not os.path.exists(cache_path):
+        df = read_student_csv(path)
+        # Uncompressed so the file can be memory-mapped
+        with atomic_write(cache_path) as tmp_path:
+            feather.write_feather(df, tmp_path, compression="uncompressed")
+        # Drop copies made from earlier versions of the same CSV or schema
+        for stale_path in glob.glob(os.path.join(COLUMNAR_CACHE_DIR, f"{stem}-{path_key}-*.feather")):
+            if stale_path != cache_path:
+                try:
+                    os.remove(stale_path)
+                except FileNotFoundError:
+                    pass  # removed by another process converting the same CSV
+        return df
+
+    return feather.read_feather(cache_path, memory_map=True)
+
+
+@st.cache_resource(max_entries=MAX_CACHED_FILES, show_spinner=False)
+def _cached_student_frame(path, mtime_ns, size):
+    # mtime and size are only part of the cache key, so an edited file is loaded (and hashed) again.
+    # A resource cache hands every session the same object instead of unpickling a copy per rerun,
+    # so the frame stays backed by the memory-mapped Feather file
+    df = read_student_file(path)
+    return df, frame_fingerprint(df)
+
+
+def load_student_source(path=SAMPLE_DATA_PATH):
+    """Return (frame, fingerprint) for the student data at path, loading and hashing it at most
+    once per version of the file.
+
+    Pass the fingerprint on to the cached helpers (class_stats, roster_table, ...) so reruns
+    don't hash the frame again. The frame is shared by every session, so treat it as read-only:
+    add columns with df.assign or work on a copy.
+    """
+    stat = os.stat(path)
+    return _cached_student_frame(path, stat.st_mtime_ns, stat.st_size)
+
+
+def load_student_data(path=SAMPLE_DATA_PATH):
+    """Return the student data at path, loading it at most once per version of the file.
+
+    The frame is shared and read-only, as for load_student_source.
+    """
+    return load_student_source(path)[0]
+
+
+def frame_fingerprint(df):
+    """Return a short content hash of a frame, used as a cache key for results derived from it.
+
+    This is a full pass over the frame; compute it once per loaded source and pass it along.
+    """
+    digest = hashlib.sha256(",".join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def cache_by_fingerprint(compute, max_entries=16):
+    """Cache compute(df, *options) by a fingerprint of df instead of by df itself.
+
+    Returns a function called as cached(df, *options, fingerprint=None). Streamlit hashes only
+    the fingerprint and the options and passes the frame through unhashed, so a cache hit costs
+    nothing in proportion to the frame. fingerprint identifies df's contents (see
+    frame_fingerprint; a batch id works too) and is computed from df when omitted. compute must
+    be a module-level function, and each one gets its own cache of max_entries results.
+    """
+    def cached(fingerprint, options, _df):
+        return compute(_df, *options)
+
+    # Streamlit names a cache after the function's module and qualified name; without these,
+    # every function wrapped here would share one cache
+    cached.__module__ = compute.__module__
+    cached.__qualname__ = f"{compute.__qualname__}.cached"
+    cached = st.cache_data(max_entries=max_entries, show_spinner=False)(cached)
+
+    def lookup(df, *options, fingerprint=None):
+        return cached(fingerprint or frame_fingerprint(df), options, df)
+
+    return lookup
@@ -0,0 +1,274 @@
+# data/utils/database.py
+
+import argparse
+import contextlib
+import os
+import queue
+import sqlite3
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from data.utils.data_loader import (
+    ORDINAL_CATEGORIES, PROFILES_DATA_PATH, SAMPLE_DATA_PATH, STUDENT_SCHEMA, coerce_student_frame, file_digest,
+)
+from data.utils.ingest import DEFAULT_CHUNK_SIZE, check_required_columns, read_header, validate_chunk
+
+STUDENT_DB_PATH = "data/db/students.sqlite3"
+
+# Connections kept open per database file; sessions beyond this wait for a free one
+POOL_SIZE = 8
+# Seconds a connection waits on a lock held by another writer before giving up
+BUSY_TIMEOUT = 30
+
+# Record columns stored for every student, in table order
+STUDENT_COLUMNS = [column for column in STUDENT_SCHEMA if column not in ("predicted_gpa", "gpa_change")]
+PROFILE_COLUMNS = ["student_id", "name", "grade_level"]
+
+# Students below this previous GPA are reported as at risk
+AT_RISK_GPA = 2.5
+
+STUDENT_SQL_TYPES = {"age": "INTEGER", "attendance": "INTEGER", "sleep_hours": "INTEGER",
+                     "study_hours": "REAL", "previous_gpa": "REAL"}
+
+STUDENT_DB_SCHEMA = f"""
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+CREATE TABLE IF NOT EXISTS students (
+    student_id TEXT PRIMARY KEY,
+    {", ".join(f"{column} {STUDENT_SQL_TYPES.get(column, 'TEXT')}" for column in STUDENT_COLUMNS[1:])}
+);
+CREATE INDEX IF NOT EXISTS students_previous_gpa ON students (previous_gpa);
+CREATE TABLE IF NOT EXISTS student_profiles (
+    student_id TEXT PRIMARY KEY,
+    name TEXT,
+    grade_level TEXT
+);
+CREATE INDEX IF NOT EXISTS student_profiles_grade_level ON student_profiles (grade_level);
+CREATE TABLE IF NOT EXISTS subject_scores (
+    student_id TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    score REAL,
+    PRIMARY KEY (student_id, subject)
+);
+CREATE TABLE IF NOT EXISTS imports (
+    table_name TEXT NOT NULL,
+    source TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    PRIMARY KEY (table_name, source)
+);
+"""
+
+
+@st.cache_resource(show_spinner=False)
+def _connection_pool(path, schema):
+    # One pool per database file and process, shared by every session
+    return {"idle": queue.LifoQueue(), "slots": threading.BoundedSemaphore(POOL_SIZE)}
+
+
+def _open_connection(path, schema):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # A pooled connection moves between session threads but is only ever used by one at a time
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+    conn.executescript(schema)
+    return conn
+
+
+@contextlib.contextmanager
+def pooled_connection(path, schema):
+    """Borrow a connection to the SQLite file at path from its process-wide pool.
+
+    schema is a SQL script run once per new connection (tables, indexes and pragmas; it must be
+    idempotent). The transaction is committed when the block exits normally and rolled back
+    if it raises.
+    """
+    pool = _connection_pool(path, schema)
+    with pool["slots"]:
+        try:
+            conn = pool["idle"].get_nowait()
+        except queue.Empty:
+            conn = _open_connection(path, schema)
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            pool["idle"].put(conn)
+
+
+def student_db(path=STUDENT_DB_PATH):
+    """Borrow a pooled connection to the student records database."""
+    return pooled_connection(path, STUDENT_DB_SCHEMA)
+
+
+def _sql_rows(df):
+    # Plain Python values with None for missing cells, as sqlite3 expects
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+
+def import_students(source, db_path=STUDENT_DB_PATH, replace=False, chunksize=DEFAULT_CHUNK_SIZE):
+    """Bulk load a student records CSV into the students table and return the number of rows read.
+
+    Rows are validated like uploads and written chunk by chunk in one transaction; a student id
+    already in the table is overwritten by the file's row. replace empties the table first.
+    """
+    check_required_columns(read_header(source))
+    columns = ", ".join(STUDENT_COLUMNS)
+    updates = ", ".join(f"{column} = excluded.{column}" for column in STUDENT_COLUMNS[1:])
+    insert = (f"INSERT INTO students ({columns}) VALUES ({', '.join('?' * len(STUDENT_COLUMNS))}) "
+              f"ON CONFLICT (student_id) DO UPDATE SET {updates}")
+
+    rows = 0
+    with student_db(db_path) as conn:
+        if replace:
+            conn.execute("DELETE FROM students")
+        # Ordinal columns are read as text so invalid labels can be reported before casting
+        reader = pd.read_csv(source, chunksize=chunksize, keep_default_na=False, na_values=[""],
+                             dtype={column: "string" for column in ORDINAL_CATEGORIES})
+        for chunk in reader:
+            validate_chunk(chunk, first_line=rows + 2)
+            # Stored as parsed (float64 rather than the in-memory float32) so values keep their decimals
+            chunk = chunk.reindex(columns=STUDENT_COLUMNS)
+            conn.executemany(insert, _sql_rows(chunk))
+            rows += len(chunk)
+    return rows
+
+
+def import_profiles(source, db_path=STUDENT_DB_PATH, replace=False):
+    """Bulk load a subject profiles CSV: one row per student with a column per subject score.
+
+    Profiles go to student_profiles and scores to subject_scores, one row per student and
+    subject, so subjects can be added without a schema change. Returns the number of students read.
+    """
+    df = pd.read_csv(source, dtype={"student_id": "string", "name": "string", "grade_level": "string"})
+    missing_columns = [column for column in PROFILE_COLUMNS if column not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}.")
+    subjects = [column for column in df.columns if column not in PROFILE_COLUMNS]
+    scores = df.melt(id_vars="student_id", value_vars=subjects, var_name="subject", value_name="score")
+
+    with student_db(db_path) as conn:
+        if replace:
+            conn.execute("DELETE FROM student_profiles")
+            conn.execute("DELETE FROM subject_scores")
+        conn.executemany("INSERT OR REPLACE INTO student_profiles VALUES (?, ?, ?)", _sql_rows(df[PROFILE_COLUMNS]))
+        conn.executemany("INSERT OR REPLACE INTO subject_scores VALUES (?, ?, ?)", _sql_rows(scores))
+    return len(df)
+
+
+def _record_import(table, source, rows, db_path):
+    with student_db(db_path) as conn:
+        conn.execute("INSERT OR REPLACE INTO imports VALUES (?, ?, ?, ?)",
+                     (table, os.path.abspath(source), file_digest(source), rows))
+
+
+def _imported_digest(table, source, db_path):
+    with student_db(db_path) as conn:
+        row = conn.execute("SELECT digest FROM imports WHERE table_name = ? AND source = ?",
+                           (table, os.path.abspath(source))).fetchone()
+    return row[0] if row else None
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _cached_bundled_import(db_path, sources):
+    # sources holds (table, path, mtime_ns, size) so an edited file is imported again
+    for table, path, _, _ in sources:
+        if _imported_digest(table, path, db_path) != file_digest(path):
+            importer = import_students if table == "students" else import_profiles
+            _record_import(table, path, importer(path, db_path), db_path)
+    return True
+
+
+def ensure_database(db_path=STUDENT_DB_PATH, students_path=SAMPLE_DATA_PATH, profiles_path=PROFILES_DATA_PATH):
+    """Import the bundled CSVs into the database unless the same file contents are already there.
+
+    Rows are upserted by student id, so records imported from other files are kept.
+    Checked once per process and file version; call before querying the bundled records.
+    """
+    sources = tuple((table, path, os.stat(path).st_mtime_ns, os.stat(path).st_size)
+                    for table, path in (("students", students_path), ("student_profiles", profiles_path))
+                    if os.path.exists(path))
+    return _cached_bundled_import(db_path, sources)
+
+
+def get_student(student_id, db_path=STUDENT_DB_PATH):
+    """Look up one student's record by primary key.
+
+    Returns the record as a dict of plain Python values, or None if the id is unknown.
+    """
+    with student_db(db_path) as conn:
+        df = pd.read_sql_query(f"SELECT {', '.join(STUDENT_COLUMNS)} FROM students WHERE student_id = ?", conn,
+                               params=(str(student_id),))
+    if df.empty:
+        return None
+    return df.to_dict("records")[0]
+
+
+def count_at_risk(threshold=AT_RISK_GPA, db_path=STUDENT_DB_PATH):
+    """Number of students whose previous GPA is below threshold."""
+    with student_db(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM students WHERE previous_gpa < ?", (threshold,)).fetchone()[0]
+
+
+def at_risk_students(threshold=AT_RISK_GPA, offset=0, limit=None, db_path=STUDENT_DB_PATH):
+    """Students whose previous GPA is below threshold, lowest GPA first, read through the GPA index."""
+    sql = (f"SELECT {', '.join(STUDENT_COLUMNS)} FROM students WHERE previous_gpa < ? "
+           "ORDER BY previous_gpa, student_id")
+    if limit is not None:
+        sql += f" LIMIT {int(limit)} OFFSET {int(offset)}"
+    with student_db(db_path) as conn:
+        return coerce_student_frame(pd.read_sql_query(sql, conn, params=(threshold,)))
+
+
+def class_aggregates(db_path=STUDENT_DB_PATH):
+    """Headline numbers for all stored students as a dict.
+
+    Holds rows, previous GPA mean/min/max (min and max come straight from the GPA index),
+    the at-risk count and students per behavior level, in level order.
+    """
+    with student_db(db_path) as conn:
+        rows, gpa_mean, gpa_min, gpa_max, at_risk = conn.execute(
+            "SELECT COUNT(*), AVG(previous_gpa), MIN(previous_gpa), MAX(previous_gpa), "
+            "SUM(previous_gpa < ?) FROM students", (AT_RISK_GPA,)).fetchone()
+        counts = dict(conn.execute("SELECT behavior_score, COUNT(*) FROM students GROUP BY behavior_score"))
+    behavior_counts = {level: counts.get(level, 0) for level in ORDINAL_CATEGORIES["behavior_score"]}
+    return {
+        "rows": rows,
+        "previous_gpa_mean": gpa_mean,
+        "previous_gpa_min": gpa_min,
+        "previous_gpa_max": gpa_max,
+        "at_risk": at_risk or 0,
+        "behavior_counts": behavior_counts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import CSV files into the student records database.")
+    parser.add_argument("--students", action="append", default=[], help="student records CSV (repeatable)")
+    parser.add_argument("--profiles", action="append", default=[], help="subject profiles CSV (repeatable)")
+    parser.add_argument("--db", default=STUDENT_DB_PATH, help="database file")
+    parser.add_argument("--replace", action="store_true", help="empty the tables before importing")
+    args = parser.parse_args()
+    if not args.students and not args.profiles:
+        args.students, args.profiles = [SAMPLE_DATA_PATH], [PROFILES_DATA_PATH]
+
+    for i, path in enumerate(args.students):
+        rows = import_students(path, args.db, replace=args.replace and i == 0)
+        _record_import("students", path, rows, args.db)
+        print(f"Imported {rows:,} student records from {path}")
+    for i, path in enumerate(args.profiles):
+        rows = import_profiles(path, args.db, replace=args.replace and i == 0)
+        _record_import("student_profiles", path, rows, args.db)
+        print(f"Imported {rows:,} student profiles from {path}")
+
+    summary = class_aggregates(args.db)
+    print(f"Database holds {summary['rows']:,} students, average previous GPA {summary['previous_gpa_mean'] or 0:.2f}, "
+          f"{summary['at_risk']:,} below {AT_RISK_GPA}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# data/utils/export.py
+
+import importlib.util
+import io
+
+import streamlit as st
+
+from data.utils.metrics import timed
+from data.utils.prediction_store import read_rows
+
+# Download formats: (label, file extension, MIME type)
+EXPORT_FORMATS = {
+    "csv.gz": ("CSV (gzip)", "csv.gz", "application/gzip"),
+    "parquet": ("Parquet", "parquet", "application/vnd.apache.parquet"),
+    "xlsx": ("Excel", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+# pandas writes Excel through either of these; openpyxl is in requirements.txt
+EXCEL_ENGINES = ["openpyxl", "xlsxwriter"]
+# Rows in an Excel sheet, less the header
+EXCEL_MAX_ROWS = 1_048_575
+
+# Export payloads kept in memory at once; the least recently used are evicted first
+EXPORT_CACHE_ENTRIES = 8
+
+
+def excel_engine():
+    """Name of an installed Excel writer for pandas, or None; checked without importing it."""
+    return next((engine for engine in EXCEL_ENGINES if importlib.util.find_spec(engine)), None)
+
+
+def available_formats(rows):
+    """The EXPORT_FORMATS keys that can be written for a batch of this many rows."""
+    formats = ["csv.gz", "parquet"]
+    if excel_engine() is not None and rows <= EXCEL_MAX_ROWS:
+        formats.append("xlsx")
+    return formats
+
+
+def export_bytes(df, fmt):
+    """Serialize df (without its index) in one of the EXPORT_FORMATS."""
+    buffer = io.BytesIO()
+    if fmt == "csv.gz":
+        # Level 3 is about a third faster than level 6 for a file ~20% larger; mtime=0 keeps
+        # the bytes identical for identical data
+        df.to_csv(buffer, index=False, compression={"method": "gzip", "compresslevel": 3, "mtime": 0})
+    elif fmt == "parquet":
+        df.to_parquet(buffer, index=False)
+    elif fmt == "xlsx":
+        engine = excel_engine()
+        if engine is None:
+            raise ImportError("Excel export needs openpyxl: pip install openpyxl")
+        if len(df) > EXCEL_MAX_ROWS:
+            raise ValueError(f"Excel sheets hold at most {EXCEL_MAX_ROWS:,} rows; use CSV or Parquet")
+        df.to_excel(buffer, index=False, engine=engine)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return buffer.getvalue()
+
+
+@st.cache_resource(max_entries=EXPORT_CACHE_ENTRIES, show_spinner=False)
+def _cached_export(batch_id, fmt, columns):
+    # Batches never change once saved, so the id is the fingerprint of the data
+    return export_bytes(read_rows(batch_id, list(columns) if columns else None), fmt)
+
+
+def export_batch(batch_id, fmt, columns=None, page=None):
+    """A batch (or some of its columns) serialized as fmt, built once per process and then shared.
+
+    Meant to be passed to st.download_button as a callable, so nothing is serialized until a
+    download is requested. page names the page in the export:<fmt> timing (see metrics.timed).
+    """
+    with timed(f"export:{fmt}", page):
+        return _cached_export(batch_id, fmt, tuple(columns) if columns else None)
+
+
+def export_file_name(base_name, fmt):
+    """base_name with the extension of fmt, e.g. student_predictions.csv.gz."""
+    return f"{base_name}.{EXPORT_FORMATS[fmt][1]}"
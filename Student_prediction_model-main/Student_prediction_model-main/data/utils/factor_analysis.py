@@ -0,0 +1,70 @@
+# data/utils/factor_analysis.py
+
+import numpy as np
+import pandas as pd
+
+from data.utils.data_loader import cache_by_fingerprint
+from data.utils.stats import analysis_matrix, numeric_code_column
+
+# Prediction outputs that are never treated as factors of themselves
+OUTPUT_COLUMNS = ["predicted_gpa", "gpa_change", "predicted_behavior"]
+
+
+def _rank_columns(X):
+    # Average ranks per column, the same ties handling as Spearman's rho
+    return pd.DataFrame(X).rank(method="average").to_numpy()
+
+
+def compute_factor_analysis(df, target="predicted_gpa", spearman=True):
+    """Relate every factor in df to the target column with one correlation matrix.
+
+    Factors are the numeric columns (other than prediction outputs) and the codes of the
+    ordinal columns. Returns a frame with one row per factor, sorted by correlation:
+        Factor: column name
+        Correlation: Pearson correlation with the target
+        Spearman: rank correlation with the target (only when spearman is True)
+        Std. Coefficient: standardized regression coefficient of the factor when the target
+            is regressed on all factors at once, solved from the same correlation matrix
+    """
+    X, numeric_columns, ordinal_columns = analysis_matrix(df)
+    columns = numeric_columns + [numeric_code_column(column) for column in ordinal_columns]
+    keep = [j for j, column in enumerate(columns) if column == target or column not in OUTPUT_COLUMNS]
+    X = X[:, keep]
+    columns = [columns[j] for j in keep]
+    factors = [column for column in columns if column != target]
+    if target not in columns or not factors:
+        return pd.DataFrame(columns=["Factor", "Correlation", "Std. Coefficient"])
+
+    # Rows with any gap are left out so every factor is measured on the same students
+    X = X[~np.isnan(X).any(axis=1)]
+    target_index = columns.index(target)
+    factor_index = [j for j in range(len(columns)) if j != target_index]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        R = np.corrcoef(X, rowvar=False)
+        result = pd.DataFrame({"Factor": factors, "Correlation": R[factor_index, target_index]})
+        if spearman:
+            R_rank = np.corrcoef(_rank_columns(X), rowvar=False)
+            result["Spearman"] = R_rank[factor_index, target_index]
+
+    # Standardized coefficients: beta = R_xx^-1 r_xy. Constant factors have NaN correlations
+    # and get no coefficient; lstsq copes with collinear ones.
+    usable = ~np.isnan(R[factor_index, target_index])
+    coefficients = np.full(len(factors), np.nan)
+    if usable.any():
+        rows = np.array(factor_index)[usable]
+        coefficients[usable] = np.linalg.lstsq(R[np.ix_(rows, rows)], R[rows, target_index], rcond=None)[0]
+    result["Std. Coefficient"] = coefficients
+
+    return result.sort_values("Correlation", ascending=False, ignore_index=True)
+
+
+_cached_factor_analysis = cache_by_fingerprint(compute_factor_analysis)
+
+
+def factor_analysis(df, target="predicted_gpa", spearman=True, fingerprint=None):
+    """Return compute_factor_analysis for df, computed once per prediction batch.
+
+    fingerprint identifies df's contents, e.g. the batch id; it is computed from df when omitted.
+    """
+    return _cached_factor_analysis(df, target, spearman, fingerprint=fingerprint)
@@ -0,0 +1,134 @@
+# data/utils/figures.py
+
+import io
+
+import numpy as np
+import streamlit as st
+
+from data.utils.metrics import timed
+
+# Rendered charts kept in memory at once; the least recently used are evicted first
+FIGURE_CACHE_ENTRIES = 64
+FIGURE_DPI = 100
+
+
+def load_pyplot():
+    """Import and return matplotlib.pyplot on the non-interactive backend.
+
+    matplotlib takes longer to import than the rest of a page, so it is only loaded
+    the first time a chart is drawn (or by the background warm-up).
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def figure_png(fig):
+    """Render a matplotlib figure to PNG bytes and close it."""
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=FIGURE_DPI, bbox_inches="tight")
+        return buffer.getvalue()
+    finally:
+        load_pyplot().close(fig)
+
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def _cached_chart_png(chart, data_key, _build):
+    # Only the chart name and data key are hashed by Streamlit; the builder is passed through
+    return figure_png(_build())
+
+
+def chart_png(chart, data_key, build):
+    """Return the chart as PNG bytes, calling build() only the first time (chart, data_key) is seen.
+
+    build must return a matplotlib figure; it is closed once rendered. data_key should change
+    whenever the data drawn by build changes, e.g. the plotted values or a frame fingerprint.
+    """
+    # Timed as stage chart:<chart> of the calling page; cache hits show up as near-zero times
+    with timed(f"chart:{chart}"):
+        return _cached_chart_png(chart, data_key, build)
+
+
+def gauge_figure(value, max_value, ticks, color, title, tick_labels=None):
+    """Horizontal bar showing value on a 0..max_value scale."""
+    fig, ax = load_pyplot().subplots(figsize=(4, 0.3))
+    ax.barh(0, max_value, color='lightgray', height=0.2)
+    ax.barh(0, value, color=color, height=0.2)
+    ax.set_xlim(0, max_value)
+    ax.set_yticks([])
+    ax.set_xticks(ticks)
+    if tick_labels is not None:
+        ax.set_xticklabels(tick_labels)
+    ax.set_title(title)
+    return fig
+
+
+def factor_bar_figure(factors, values):
+    """Bar chart of a student's normalized performance factors with value labels."""
+    fig, ax = load_pyplot().subplots(figsize=(10, 5))
+    bars = ax.bar(factors, values, color=['blue', 'green', 'orange', 'red', 'purple', 'brown'])
+    ax.set_ylim(0, 1)
+    ax.set_ylabel('Normalized Score')
+    ax.set_title('Your Performance Factors')
+
+    # Add value labels on top of bars
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width() / 2., height + 0.02, f'{height:.2f}', ha='center', va='bottom')
+    return fig
+
+
+def gpa_distribution_figure(distributions):
+    """Histograms with KDE of current and predicted GPA, drawn from precomputed distributions.
+
+    distributions maps previous_gpa and predicted_gpa to compute_distribution results, so
+    drawing costs the same whatever the number of students.
+    """
+    fig, ax = load_pyplot().subplots(figsize=(10, 6))
+    series = [('previous_gpa', 'blue', 'Current GPA'), ('predicted_gpa', 'orange', 'Predicted GPA')]
+    for column, color, label in series:
+        distribution = distributions[column]
+        edges = distribution["edges"]
+        ax.bar(edges[:-1], distribution["counts"], width=np.diff(edges), align='edge', color=color, alpha=0.5,
+               edgecolor='white', label=label)
+        if distribution["kde"] is not None:
+            ax.plot(distribution["grid"], distribution["kde"], color=color)
+    ax.set_xlabel('GPA')
+    ax.set_ylabel('Number of Students')
+    ax.set_title('GPA Distribution Comparison')
+    ax.legend()
+    return fig
+
+
+def factor_correlation_figure(corr_df):
+    """Horizontal bar chart of each factor's correlation with predicted GPA."""
+    import seaborn as sns
+
+    fig, ax = load_pyplot().subplots(figsize=(10, 5))
+    sns.barplot(x='Correlation', y='Factor', hue='Factor', data=corr_df, ax=ax, palette="viridis", legend=False)
+    ax.set_xlabel('Correlation with Predicted GPA')
+    ax.set_title('Impact of Different Factors on GPA')
+    return fig
+
+
+def what_if_surface_figure(study_hours, attendance, predicted_gpa, marker=None):
+    """Heatmap of predicted GPA over study hours (rows of predicted_gpa) and attendance (columns).
+
+    marker is an optional (study hours, attendance) point to highlight, e.g. the current scenario.
+    """
+    fig, ax = load_pyplot().subplots(figsize=(10, 5))
+    # Colors span this surface's own range, since habits move a prediction by tenths of a point
+    mesh = ax.pcolormesh(attendance, study_hours, predicted_gpa, shading='nearest', cmap='viridis')
+    fig.colorbar(mesh, ax=ax, label='Predicted GPA')
+    if np.ptp(predicted_gpa) > 0:
+        contours = ax.contour(attendance, study_hours, predicted_gpa, levels=6, colors='white', linewidths=0.8)
+        ax.clabel(contours, fmt='%.2f', fontsize=8)
+    if marker is not None:
+        ax.plot(marker[1], marker[0], marker='o', markersize=10, markerfacecolor='none', markeredgecolor='red',
+                markeredgewidth=2)
+    ax.set_xlabel('Attendance (%)')
+    ax.set_ylabel('Daily Study Hours')
+    ax.set_title('Predicted GPA by Study Hours and Attendance')
+    return fig
@@ -0,0 +1,47 @@
+# data/utils/files.py
+
+import contextlib
+import hashlib
+import os
+import tempfile
+
+# Only the standard library is imported here, so pages that merely show images don't load pandas
+
+# Read once at import: os.umask can only be read by setting it, which isn't safe once threads run
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def file_digest(path, block_size=1 << 20):
+    """Return a short SHA-256 hex digest of the file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def file_format(path):
+    """Format of a roster file from its extension: parquet for .parquet/.pq, csv otherwise."""
+    return "parquet" if path.lower().endswith((".parquet", ".pq")) else "csv"
+
+
+@contextlib.contextmanager
+def atomic_write(path):
+    """Yield a temporary path in path's directory, moved over path once the block succeeds.
+
+    Readers never see a half-written file, and processes writing the same path at once never
+    touch each other's temporary file. Temporary files are hidden dotfiles ending in ".tmp", and
+    the finished file gets the usual permissions (0644 less the umask) rather than mkstemp's 0600.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}-", suffix=".tmp")
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.chmod(tmp_path, 0o644 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
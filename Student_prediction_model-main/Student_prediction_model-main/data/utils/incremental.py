@@ -0,0 +1,96 @@
+# data/utils/incremental.py
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from data.utils.data_loader import coerce_student_frame
+from data.utils.ingest import DEFAULT_CHUNK_SIZE
+from data.utils.ml_utils import get_linear_model, predict_gpa
+from data.utils.prediction_store import (
+    batch_info, derive_batch, latest_batch, read_row_hashes, save_predictions,
+)
+
+# Columns written by scoring; every other column of a roster is part of its row hash
+PREDICTION_COLUMNS = ["predicted_gpa", "gpa_change"]
+
+
+def scoring_key(method, model=None):
+    """16-character key naming the method and, for the regression, the fitted coefficients.
+
+    It seeds the row hashes, so retraining the model makes every row look changed.
+    """
+    digest = hashlib.sha256(method.encode())
+    if method == "Linear Regression":
+        digest.update(np.asarray(model["coef"], dtype=np.float64).tobytes())
+        digest.update(np.float64(model["intercept"]).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def row_hashes(df, key):
+    """One uint64 per row over every input column of df, computed in a single vectorized pass.
+
+    df must be in the student schema (see coerce_student_frame) so a value hashes the same
+    whether it was just uploaded or read back from the store.
+    """
+    columns = [column for column in df.columns if column not in PREDICTION_COLUMNS]
+    return pd.util.hash_pandas_object(df[columns], index=False, hash_key=key).to_numpy()
+
+
+def score_roster(df, method, model=None, chunksize=DEFAULT_CHUNK_SIZE):
+    """Return a copy of df with predicted_gpa and gpa_change added, in the student schema.
+
+    Rows are scored chunksize at a time, so the feature matrices built for scoring stay
+    bounded by the chunk size rather than the roster.
+    """
+    if method == "Linear Regression" and model is None:
+        model = get_linear_model()
+    predicted_gpa = np.empty(len(df))
+    for start in range(0, len(df), chunksize):
+        predicted_gpa[start:start + chunksize] = predict_gpa(df.iloc[start:start + chunksize], method, model)
+    gpa_change = predicted_gpa - df["previous_gpa"].to_numpy(dtype=np.float64)
+    return coerce_student_frame(df.assign(predicted_gpa=predicted_gpa, gpa_change=gpa_change))
+
+
+def rescore_roster(df, method, owner_id, label, model=None):
+    """Score a roster and save it, rescoring only students that changed since the last batch.
+
+    The last batch is the owner's most recent one for the same label (data source) and method.
+    Students whose row hash matches their row in that batch keep its predictions; the new batch
+    is derived from it, so unchanged rows are neither scored nor written again. Without a usable
+    last batch (none yet, different columns, or repeated student ids) every student is scored.
+
+    Returns (batch_id, summary) where summary counts rescored, reused and removed students.
+    """
+    if method == "Linear Regression" and model is None:
+        model = get_linear_model()
+    df = coerce_student_frame(df.drop(columns=PREDICTION_COLUMNS, errors="ignore"))
+    hashes = row_hashes(df, scoring_key(method, model))
+    unique_ids = not df["student_id"].duplicated().any()
+
+    base_id = latest_batch("class", owner_id, label, method)
+    base = batch_info(base_id) if base_id else None
+    previous = read_row_hashes(base_id) if base else None
+    if previous is None or not unique_ids or base["columns"] != list(df.columns) + PREDICTION_COLUMNS:
+        batch_id = save_predictions(score_roster(df, method, model), owner_id=owner_id, label=label, method=method,
+                                    row_hashes=hashes if unique_ids else None)
+        return batch_id, {"rescored": len(df), "reused": 0, "removed": 0}
+
+    # Position of each student in the last batch (-1 for new students), then compare hashes
+    ids = df["student_id"].to_numpy(dtype=object)
+    positions = pd.Index(previous["student_id"].to_numpy(dtype=object)).get_indexer(ids)
+    previous_hashes = previous["row_hash"].to_numpy()
+    changed = (positions < 0) | (previous_hashes[np.maximum(positions, 0)] != hashes)
+    removed = np.ones(len(previous), dtype=bool)
+    removed[positions[positions >= 0]] = False
+    summary = {"rescored": int(changed.sum()), "reused": int((~changed).sum()), "removed": int(removed.sum())}
+    if not changed.any() and not removed.any():
+        return base_id, summary
+
+    # Changed students are dropped from the copy and appended with their new predictions
+    drop_ids = np.concatenate([ids[changed & (positions >= 0)],
+                               previous["student_id"].to_numpy(dtype=object)[removed]])
+    batch_id = derive_batch(base_id, drop_ids, score_roster(df[changed], method, model), hashes[changed],
+                            owner_id=owner_id, label=label, method=method)
+    return batch_id, summary
@@ -0,0 +1,118 @@
+# data/utils/ingest.py
+
+import numpy as np
+import pandas as pd
+
+from data.utils.data_loader import ORDINAL_CATEGORIES, STUDENT_SCHEMA, coerce_student_frame
+
+REQUIRED_COLUMNS = [
+    "student_id", "name", "previous_gpa", "attendance", "study_hours", "class_participation",
+    "homework_completion", "behavior_score", "sleep_hours", "extracurricular", "stress_level",
+]
+
+# Allowed (min, max) for numeric columns; rows outside these are rejected
+NUMERIC_RANGES = {
+    "age": (0, 120),
+    "attendance": (0, 100),
+    "study_hours": (0, 24),
+    "previous_gpa": (0, 5),  # weighted GPAs can go above 4.0
+    "sleep_hours": (0, 24),
+}
+
+# Columns stored as integers; fractional values in them are rejected rather than truncated
+INTEGER_COLUMNS = [column for column, dtype in STUDENT_SCHEMA.items() if str(dtype).startswith("int")]
+
+# Columns parsed as text: ids keep their leading zeros ("007" stays "007", as in read_student_csv),
+# and ordinal labels are checked against their levels before the categorical cast
+TEXT_DTYPES = {"student_id": "string", "name": "string", **{column: "string" for column in ORDINAL_CATEGORIES}}
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def read_header(source):
+    """Return the column names of a CSV without parsing any rows, rewinding file objects afterwards."""
+    columns = pd.read_csv(source, nrows=0).columns.tolist()
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return columns
+
+
+def check_required_columns(columns):
+    """Raise ValueError naming any required column missing from columns."""
+    missing_columns = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}. "
+                         "Please ensure your CSV file includes all necessary columns.")
+
+
+def validate_chunk(chunk, first_line):
+    """Raise ValueError for the first value outside its column's domain.
+
+    first_line is the file line number of the chunk's first row, used in the message.
+    """
+    for column, levels in ORDINAL_CATEGORIES.items():
+        if column not in chunk.columns:
+            continue
+        invalid = ~chunk[column].isin(levels).to_numpy()
+        if invalid.any():
+            row = int(np.argmax(invalid))
+            raise ValueError(f"Invalid {column} '{chunk[column].iloc[row]}' on line {first_line + row}. "
+                             f"Expected one of: {', '.join(levels)}.")
+
+    for column, (low, high) in NUMERIC_RANGES.items():
+        if column not in chunk.columns:
+            continue
+        values = pd.to_numeric(chunk[column], errors="coerce").to_numpy(dtype=np.float64)
+        # NaN fails both comparisons, so missing and non-numeric cells are caught too
+        invalid = ~((values >= low) & (values <= high))
+        whole = column in INTEGER_COLUMNS
+        if whole:
+            invalid |= values != np.round(values)
+        if invalid.any():
+            row = int(np.argmax(invalid))
+            raise ValueError(f"Invalid {column} '{chunk[column].iloc[row]}' on line {first_line + row}. "
+                             f"Expected a {'whole ' if whole else ''}number from {low} to {high}.")
+
+
+def stream_student_csv(source, columns=None, chunksize=DEFAULT_CHUNK_SIZE):
+    """Validate and compact a student CSV one chunk at a time.
+
+    The header is checked before any row is parsed. Each chunk is validated and cast to the
+    student schema. Only the requested output columns that a chunk has are kept (all of them
+    if columns is None), so peak memory beyond the output is bounded by the chunk size.
+    Scoring is a separate step (see incremental.score_roster).
+
+    Returns (frame, aggregates) where aggregates holds running totals over all rows.
+    """
+    check_required_columns(read_header(source))
+
+    aggregates = {
+        "rows": 0,
+        "previous_gpa_sum": 0.0,
+        "previous_gpa_min": np.inf,
+        "previous_gpa_max": -np.inf,
+        "behavior_counts": dict.fromkeys(ORDINAL_CATEGORIES["behavior_score"], 0),
+    }
+
+    parts = []
+    reader = pd.read_csv(source, chunksize=chunksize, keep_default_na=False, na_values=[""], dtype=TEXT_DTYPES)
+    for chunk in reader:
+        # Header is line 1, so the first data row is line 2
+        validate_chunk(chunk, first_line=aggregates["rows"] + 2)
+        chunk = coerce_student_frame(chunk)
+
+        gpa = chunk["previous_gpa"].to_numpy(dtype=np.float64)
+        aggregates["rows"] += len(chunk)
+        aggregates["previous_gpa_sum"] += gpa.sum()
+        aggregates["previous_gpa_min"] = min(aggregates["previous_gpa_min"], gpa.min())
+        aggregates["previous_gpa_max"] = max(aggregates["previous_gpa_max"], gpa.max())
+        for level, count in chunk["behavior_score"].value_counts(sort=False).items():
+            aggregates["behavior_counts"][level] += int(count)
+
+        parts.append(chunk[[column for column in columns if column in chunk.columns]] if columns is not None
+                     else chunk)
+
+    if not parts:
+        raise ValueError("The file has a header but no student records.")
+    # Cast again so unordered categoricals (like gender) seen with different levels per chunk stay categorical
+    return coerce_student_frame(pd.concat(parts, ignore_index=True)), aggregates
@@ -0,0 +1,45 @@
+# data/utils/interventions.py
+
+import numpy as np
+import pandas as pd
+
+# Students whose predicted GPA drops by more than this are flagged
+DECLINE_THRESHOLD = -0.1
+
+# Upper edges of the intervention levels, most severe first. Each level includes its upper edge;
+# everything at or below -0.5 is Urgent and everything above -0.1 needs no intervention.
+INTERVENTION_EDGES = [-0.5, -0.3, -0.1]
+INTERVENTION_LEVELS = ["Urgent", "High", "Medium", "Low"]
+
+RECOMMENDATIONS = np.array([
+    "Schedule a parent-teacher conference and consider tutoring.",
+    "Regular check-ins and study plan review are recommended.",
+    "Monitor progress.",
+    "Monitor progress.",
+])
+
+
+def assign_intervention_levels(gpa_change):
+    """Return the index into INTERVENTION_LEVELS for each GPA change, in one vectorized pass."""
+    changes = np.asarray(gpa_change, dtype=np.float64)
+    return np.digitize(changes, INTERVENTION_EDGES, right=True)
+
+
+def build_intervention_table(df, columns=("student_id", "name", "previous_gpa", "predicted_gpa", "gpa_change")):
+    """Return the declining students with their intervention level and recommendation.
+
+    Rows are ordered by level (Urgent first) and by GPA change within a level.
+    """
+    changes = df["gpa_change"].to_numpy(dtype=np.float64)
+    declining = np.flatnonzero(changes < DECLINE_THRESHOLD)
+    levels = assign_intervention_levels(changes[declining])
+
+    # One sort groups the students by level, most severe decline first within each level
+    order = np.lexsort((changes[declining], levels))
+    rows = declining[order]
+    levels = levels[order]
+
+    table = df.iloc[rows][[column for column in columns if column in df.columns]].reset_index(drop=True)
+    table["intervention_level"] = pd.Categorical.from_codes(levels, INTERVENTION_LEVELS, ordered=True)
+    table["recommendation"] = RECOMMENDATIONS[levels]
+    return table
@@ -0,0 +1,218 @@
+# data/utils/metrics.py
+
+import collections
+import json
+import math
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import streamlit as st
+
+# Every timing and rerun is appended here as one JSON object per line
+METRICS_LOG_PATH = "data/cache/metrics.jsonl"
+# The log is moved to METRICS_LOG_PATH + ".1" once it grows past this size
+MAX_LOG_BYTES = 10 * 1024 * 1024
+
+# Set this environment variable to a file path (e.g. a node_exporter textfile collector
+# directory) to also export the metrics in the Prometheus text format
+PROMETHEUS_PATH_ENV = "STUDENT_APP_PROMETHEUS_FILE"
+# Seconds between rewrites of the Prometheus file
+PROMETHEUS_INTERVAL = 10
+
+# Most recent timings kept per (page, stage) for the percentiles of the admin panel
+SAMPLE_WINDOW = 1000
+QUANTILES = [0.5, 0.95]
+
+# Log lines waiting for the writer thread; beyond this they are dropped rather than slow a page
+MAX_PENDING_EVENTS = 10_000
+
+
+@st.cache_resource(show_spinner=False)
+def _registry():
+    # Shared by every session of the server process; the counters are only touched under the lock,
+    # and files are written by the writer thread so no page ever waits on the disk
+    registry = {
+        "lock": threading.Lock(),
+        "samples": collections.defaultdict(lambda: collections.deque(maxlen=SAMPLE_WINDOW)),
+        "totals": collections.defaultdict(lambda: [0, 0.0]),  # (page, stage) -> [count, seconds]
+        "reruns": collections.Counter(),
+        "sessions": collections.Counter(),  # page -> sessions that ran it at least once
+        "events": queue.Queue(maxsize=MAX_PENDING_EVENTS),
+        "started_at": time.time(),
+    }
+    threading.Thread(target=_write_events, args=(registry,), name="metrics-writer", daemon=True).start()
+    return registry
+
+
+def _session_value(key, default=None):
+    # Timings recorded outside a page run (CLIs, the warm-up thread) have no session
+    try:
+        return st.session_state.get(key, default)
+    except Exception:
+        return default
+
+
+def _write_log(events):
+    os.makedirs(os.path.dirname(METRICS_LOG_PATH), exist_ok=True)
+    if os.path.exists(METRICS_LOG_PATH) and os.path.getsize(METRICS_LOG_PATH) > MAX_LOG_BYTES:
+        os.replace(METRICS_LOG_PATH, METRICS_LOG_PATH + ".1")
+    with open(METRICS_LOG_PATH, "a") as f:
+        f.writelines(json.dumps(event) + "\n" for event in events)
+
+
+def quantile(values, q):
+    """The q-quantile of values, interpolated between ranks like numpy.quantile.
+
+    Pure Python, so pages counting their reruns don't have to import numpy.
+    """
+    ordered = sorted(values)
+    position = q * (len(ordered) - 1)
+    low = math.floor(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(registry=None):
+    """The current timings and rerun counts in the Prometheus text exposition format."""
+    registry = registry or _registry()
+    # Copied under the lock, then formatted without holding it
+    with registry["lock"]:
+        totals = {key: tuple(values) for key, values in registry["totals"].items()}
+        all_samples = {key: list(values) for key, values in registry["samples"].items()}
+        reruns = dict(registry["reruns"])
+    lines = ["# HELP student_app_stage_seconds Time spent in each instrumented stage of a page.",
+             "# TYPE student_app_stage_seconds summary"]
+    for (page, stage), (count, total) in sorted(totals.items()):
+        labels = f'page="{_label(page)}",stage="{_label(stage)}"'
+        samples = all_samples[(page, stage)]
+        for q in QUANTILES:
+            lines.append(f'student_app_stage_seconds{{{labels},quantile="{q}"}} {quantile(samples, q):.6f}')
+        lines.append(f"student_app_stage_seconds_sum{{{labels}}} {total:.6f}")
+        lines.append(f"student_app_stage_seconds_count{{{labels}}} {count}")
+    lines += ["# HELP student_app_reruns_total Script reruns per page, across all sessions.",
+              "# TYPE student_app_reruns_total counter"]
+    for page, count in sorted(reruns.items()):
+        lines.append(f'student_app_reruns_total{{page="{_label(page)}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+def _write_prometheus(registry, path):
+    # Written under a temporary name first so a scrape never reads a half-written file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(prometheus_text(registry))
+    os.replace(tmp_path, path)
+
+
+def _write_events(registry):
+    # The writer thread: appends queued events to the log in batches and rewrites the
+    # Prometheus file every PROMETHEUS_INTERVAL seconds
+    events = registry["events"]
+    prometheus_written = 0.0
+    while True:
+        batch = []
+        try:
+            batch.append(events.get(timeout=PROMETHEUS_INTERVAL))
+            while len(batch) < MAX_PENDING_EVENTS:
+                batch.append(events.get_nowait())
+        except queue.Empty:
+            pass
+        path = os.environ.get(PROMETHEUS_PATH_ENV)
+        try:
+            if batch:
+                _write_log(batch)
+            if path and time.time() - prometheus_written >= PROMETHEUS_INTERVAL:
+                prometheus_written = time.time()
+                _write_prometheus(registry, path)
+        except OSError:
+            # Metrics must never break the app; a full disk only loses the exported copy
+            pass
+
+
+def _record(event, timing=None, rerun=None):
+    # timing is ((page, stage), seconds); rerun is (page, first run of the page in this session)
+    registry = _registry()
+    with registry["lock"]:
+        if timing is not None:
+            key, seconds = timing
+            registry["samples"][key].append(seconds)
+            totals = registry["totals"][key]
+            totals[0] += 1
+            totals[1] += seconds
+        if rerun is not None:
+            page, first_run = rerun
+            registry["reruns"][page] += 1
+            if first_run:
+                registry["sessions"][page] += 1
+    try:
+        registry["events"].put_nowait(event)
+    except queue.Full:
+        # The disk can't keep up; the counters above are still exact
+        pass
+
+
+def record_timing(stage, seconds, page=None, **fields):
+    """Record that stage took seconds on page (default: the page of the current session)."""
+    page = page or _session_value("metrics_page", "none")
+    event = {"ts": round(time.time(), 3), "event": "timing", "page": page, "stage": stage,
+             "seconds": round(seconds, 6), "session": _session_value("metrics_session"), **fields}
+    _record(event, timing=((page, stage), seconds))
+
+
+@contextmanager
+def timed(stage, page=None, **fields):
+    """Time the enclosed block (or, used as @timed(stage), every call) as stage of the page.
+
+    Extra keyword fields are added to the JSON log line, e.g. rows=len(df). The block's
+    time is recorded even if it raises.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(stage, time.perf_counter() - start, page, **fields)
+
+
+def count_rerun(page):
+    """Count a run of page's script for this session; call it at the top of every page.
+
+    Also makes page the default page of the timings recorded during the run.
+    """
+    if "metrics_session" not in st.session_state:
+        st.session_state.metrics_session = uuid.uuid4().hex[:8]
+        st.session_state.metrics_reruns = collections.Counter()
+    st.session_state.metrics_page = page
+    st.session_state.metrics_reruns[page] += 1
+    session_reruns = st.session_state.metrics_reruns[page]
+    _record({"ts": round(time.time(), 3), "event": "rerun", "page": page,
+             "session": st.session_state.metrics_session, "session_reruns": session_reruns},
+            rerun=(page, session_reruns == 1))
+
+
+def stage_summary():
+    """One dict per page and stage with its calls since the server started and the p50, p95
+    and max milliseconds of its last SAMPLE_WINDOW calls."""
+    registry = _registry()
+    with registry["lock"]:
+        samples = {key: list(values) for key, values in registry["samples"].items()}
+        totals = {key: values[0] for key, values in registry["totals"].items()}
+    return [{"page": page, "stage": stage, "calls": totals[(page, stage)],
+             "p50_ms": quantile(values, 0.5) * 1000, "p95_ms": quantile(values, 0.95) * 1000,
+             "max_ms": max(values) * 1000}
+            for (page, stage), values in sorted(samples.items())]
+
+
+def rerun_summary():
+    """One dict per page with its reruns and distinct sessions since the server started."""
+    registry = _registry()
+    with registry["lock"]:
+        return [{"page": page, "reruns": count, "sessions": registry["sessions"][page]}
+                for page, count in sorted(registry["reruns"].items())]
@@ -1 +1,276 @@
+# data/utils/ml_utils.py
 
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data.utils.data_loader import SAMPLE_DATA_PATH, load_student_data, read_student_csv
+from data.utils.files import atomic_write
+
+# Ordinal encodings shared by every page that scores students
+PARTICIPATION_MAP = {"Low": 1, "Medium": 2, "High": 3}
+HOMEWORK_MAP = {"Low": 1, "Medium": 2, "High": 3}
+BEHAVIOR_MAP = {"Poor": 1, "Average": 2, "Good": 3, "Excellent": 4}
+
+# Columns of the class formula feature matrix: (column, scale, default for unknown categories)
+# Numeric columns are divided by their scale, categorical columns by the largest code.
+CLASS_FORMULA_FEATURES = [
+    ("previous_gpa", 1, None),
+    ("attendance", 100, None),
+    ("study_hours", 6, None),
+    ("class_participation", 3, 2),
+    ("homework_completion", 3, 2),
+    ("behavior_score", 4, 2),
+]
+
+CATEGORY_MAPS = {
+    "class_participation": PARTICIPATION_MAP,
+    "homework_completion": HOMEWORK_MAP,
+    "behavior_score": BEHAVIOR_MAP,
+}
+
+# Weights of the class formula, in the same order as CLASS_FORMULA_FEATURES
+CLASS_FORMULA_WEIGHTS = np.array([0.5, 0.2, 0.2, 0.03, 0.05, 0.02])
+
+
+def encode_ordinal(values, mapping, default):
+    """Map categorical labels to their numeric codes in one vectorized pass.
+
+    Labels missing from the mapping get the default code.
+    """
+    categories = list(mapping)
+    codes = pd.Categorical(values, categories=categories).codes
+    # Extra slot at the end of the lookup table catches unknown labels (code -1)
+    lookup = np.array([mapping[c] for c in categories] + [default], dtype=np.float64)
+    return lookup[codes]
+
+
+def build_class_feature_matrix(df):
+    """Build the normalized (n_students x n_features) matrix used by the class formula."""
+    X = np.empty((len(df), len(CLASS_FORMULA_FEATURES)), dtype=np.float64)
+    for j, (column, scale, default) in enumerate(CLASS_FORMULA_FEATURES):
+        if column in CATEGORY_MAPS:
+            X[:, j] = encode_ordinal(df[column], CATEGORY_MAPS[column], default)
+        else:
+            X[:, j] = df[column].to_numpy(dtype=np.float64)
+        X[:, j] /= scale
+    return X
+
+
+def predict_class_gpa(df):
+    """Predict the GPA of every student in df with the class formula.
+
+    Returns a NumPy array aligned with the rows of df.
+    """
+    return build_class_feature_matrix(df) @ CLASS_FORMULA_WEIGHTS
+
+
+# Student model: tiered weighted formula used on the student pages
+EXTRACURRICULAR_MAP = {"None": 0, "Limited": 1, "Moderate": 2, "Extensive": 3}
+STRESS_MAP = {"Very Low": 1, "Low": 2, "Medium": 3, "High": 4, "Very High": 5}
+
+STUDENT_MODEL_FEATURES = [
+    "previous_gpa", "attendance", "study_hours", "class_participation", "homework_completion",
+    "behavior_score", "sleep_hours", "extracurricular", "stress_level",
+]
+
+# Tier boundaries on previous GPA, highest first: tier 0 is >= 3.5, tier 1 is >= 2.5, tier 2 is the rest
+GPA_TIER_THRESHOLDS = [3.5, 2.5]
+
+# One row of weights per tier, columns in the order of STUDENT_MODEL_FEATURES
+STUDENT_TIER_WEIGHTS = np.array([
+    # High achievers - attendance and homework completion are most critical
+    [0.45, 0.15, 0.10, 0.05, 0.10, 0.05, 0.05, 0.02, 0.03],
+    # Average students - study hours and participation become more important
+    [0.40, 0.15, 0.15, 0.10, 0.10, 0.02, 0.03, 0.02, 0.03],
+    # Struggling students - study hours and attendance are critical
+    [0.30, 0.20, 0.20, 0.10, 0.10, 0.02, 0.03, 0.02, 0.03],
+])
+
+# Behavior score (0-10) weights over behavior, attendance, participation, sleep and stress
+BEHAVIOR_SCORE_FEATURES = ["behavior_score", "attendance", "class_participation", "sleep_hours", "stress_level"]
+BEHAVIOR_SCORE_WEIGHTS = np.array([4.0, 2.0, 1.5, 1.0, 1.5])
+
+
+def build_student_feature_matrix(df):
+    """Build the normalized (n_students x 9) matrix used by the student model.
+
+    Columns follow STUDENT_MODEL_FEATURES. Everything except previous GPA is on a 0-1 scale.
+    """
+    X = np.empty((len(df), len(STUDENT_MODEL_FEATURES)), dtype=np.float64)
+    X[:, 0] = df["previous_gpa"].to_numpy(dtype=np.float64)
+    X[:, 1] = df["attendance"].to_numpy(dtype=np.float64) / 100
+    X[:, 2] = df["study_hours"].to_numpy(dtype=np.float64) / 6
+    X[:, 3] = encode_ordinal(df["class_participation"], PARTICIPATION_MAP, 2) / 3
+    X[:, 4] = encode_ordinal(df["homework_completion"], HOMEWORK_MAP, 2) / 3
+    X[:, 5] = encode_ordinal(df["behavior_score"], BEHAVIOR_MAP, 2) / 4
+
+    # Sleep hours has an optimal range (7-9 hours), anything outside loses score with distance from 8
+    sleep = df["sleep_hours"].to_numpy(dtype=np.float64)
+    X[:, 6] = np.where((sleep >= 7) & (sleep <= 9), 1.0, 1.0 - np.minimum(np.abs(sleep - 8), 4) / 4)
+
+    X[:, 7] = encode_ordinal(df["extracurricular"], EXTRACURRICULAR_MAP, 0) / 3
+    # Stress has negative impact, invert the scale (higher stress = lower score)
+    X[:, 8] = 1.0 - (encode_ordinal(df["stress_level"], STRESS_MAP, 3) - 1) / 4
+    return X
+
+
+def predict_student_outcomes(df):
+    """Predict GPA and behavior score for every student in df with the tiered student model.
+
+    Works the same for a single-row frame from the student form and a full class roster.
+    Returns (predicted_gpa, predicted_behavior) as NumPy arrays aligned with the rows of df.
+    """
+    X = build_student_feature_matrix(df)
+    prev_gpa = X[:, 0]
+
+    # Pick the weight row of each student's tier, then take the row-wise dot product
+    tiers = np.select(
+        [prev_gpa >= threshold for threshold in GPA_TIER_THRESHOLDS],
+        np.arange(len(GPA_TIER_THRESHOLDS)),
+        default=len(GPA_TIER_THRESHOLDS),
+    )
+    predicted_gpa = np.minimum(4.0, np.einsum("ij,ij->i", X, STUDENT_TIER_WEIGHTS[tiers]))
+
+    # Adjust prediction based on age - older students tend to be more consistent
+    age = df["age"].to_numpy(dtype=np.float64)
+    age_adjustment = np.minimum(0.1, (age - 14) * 0.01)
+    predicted_gpa = np.minimum(4.0, predicted_gpa * (1 + age_adjustment))
+
+    behavior_columns = [STUDENT_MODEL_FEATURES.index(c) for c in BEHAVIOR_SCORE_FEATURES]
+    predicted_behavior = np.minimum(10, X[:, behavior_columns] @ BEHAVIOR_SCORE_WEIGHTS)
+    return predicted_gpa, predicted_behavior
+
+
+# Linear regression model: trained on historical records and persisted as a versioned artifact
+MODEL_VERSION = 1
+LINEAR_MODEL_PATH = f"data/models/gpa_linear_v{MODEL_VERSION}.npz"
+
+# Column holding the observed GPA in history files. Files without it (like the bundled sample data)
+# are labelled with the student model so the regression still has a target to learn from.
+TARGET_COLUMN = "final_gpa"
+
+# Everything the regression needs to encode a frame the same way it was encoded at training time
+ENCODER_SPEC = {
+    "model_version": MODEL_VERSION,
+    "features": STUDENT_MODEL_FEATURES,
+    "category_maps": {
+        "class_participation": PARTICIPATION_MAP,
+        "homework_completion": HOMEWORK_MAP,
+        "behavior_score": BEHAVIOR_MAP,
+        "extracurricular": EXTRACURRICULAR_MAP,
+        "stress_level": STRESS_MAP,
+    },
+    "gpa_tier_thresholds": GPA_TIER_THRESHOLDS,
+}
+
+
+def train_linear_model(df, target=TARGET_COLUMN):
+    """Fit a linear regression from the encoded student features to GPA.
+
+    Returns a model dict with coef, intercept and the encoder spec it was trained with.
+    """
+    from sklearn.linear_model import LinearRegression
+
+    X = build_student_feature_matrix(df)
+    if target in df.columns:
+        y = df[target].to_numpy(dtype=np.float64)
+        target_source = target
+    else:
+        y, _ = predict_student_outcomes(df)
+        target_source = "student_model"
+
+    regression = LinearRegression().fit(X, y)
+    spec = dict(ENCODER_SPEC, target_source=target_source, training_rows=len(df))
+    return {"coef": regression.coef_, "intercept": float(regression.intercept_), "spec": spec}
+
+
+def save_linear_model(model, path=LINEAR_MODEL_PATH):
+    """Write the fitted coefficients and encoder spec to a single .npz artifact."""
+    # The warm-up and a "Train Model" click may save at the same time; each writes its own temporary file
+    with atomic_write(path) as tmp_path, open(tmp_path, "wb") as f:
+        np.savez(f, coef=model["coef"], intercept=model["intercept"], spec=json.dumps(model["spec"]))
+
+
+def load_linear_model(path=LINEAR_MODEL_PATH):
+    """Read a model artifact from disk.
+
+    Returns None if the file is missing or was written with a different encoder spec.
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as artifact:
+        spec = json.loads(str(artifact["spec"]))
+        model = {"coef": artifact["coef"], "intercept": float(artifact["intercept"]), "spec": spec}
+    if any(spec.get(key) != value for key, value in ENCODER_SPEC.items()):
+        return None
+    return model
+
+
+@st.cache_resource(show_spinner=False)
+def _cached_linear_model(path, mtime):
+    model = load_linear_model(path)
+    if model is None:
+        # No usable artifact yet: train once from the sample data and persist it
+        model = train_linear_model(load_student_data(SAMPLE_DATA_PATH))
+        save_linear_model(model, path)
+    return model
+
+
+def get_linear_model(path=LINEAR_MODEL_PATH):
+    """Return the persisted linear model, loaded once per process.
+
+    The cache is keyed on the artifact's modification time, so retraining picks up the new file.
+    """
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    return _cached_linear_model(path, mtime)
+
+
+def predict_linear_gpa(df, model):
+    """Predict GPA for every student in df with a fitted linear model."""
+    X = build_student_feature_matrix(df)
+    return np.clip(X @ model["coef"] + model["intercept"], 0.0, 4.0)
+
+
+# Methods offered by the Teacher page and the batch scoring command
+PREDICTION_METHODS = ["Simple Formula", "Linear Regression", "Student Model"]
+
+
+def predict_gpa(df, method, model=None):
+    """Predict the GPA of every student in df with one of PREDICTION_METHODS.
+
+    model is the fitted linear model used by "Linear Regression" (default: get_linear_model()).
+    Raises ValueError for an unknown method or when the Student Model has no age column.
+    """
+    if method == "Student Model":
+        if "age" not in df.columns:
+            raise ValueError("The Student Model needs an 'age' column in the data.")
+        # Same tiered kernel the student page uses, scored for the whole roster at once
+        return predict_student_outcomes(df)[0]
+    if method == "Linear Regression":
+        # Persisted model, loaded once per process and never refitted here
+        return predict_linear_gpa(df, model if model is not None else get_linear_model())
+    if method == "Simple Formula":
+        return predict_class_gpa(df)
+    raise ValueError(f"Unknown prediction method: {method}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and save the GPA linear regression model.")
+    parser.add_argument("--data", default=SAMPLE_DATA_PATH, help="CSV file with historical student records")
+    parser.add_argument("--target", default=TARGET_COLUMN, help="Column with the observed GPA")
+    parser.add_argument("--output", default=LINEAR_MODEL_PATH, help="Where to write the model artifact")
+    args = parser.parse_args()
+
+    model = train_linear_model(read_student_csv(args.data), target=args.target)
+    save_linear_model(model, args.output)
+    print(f"Saved model trained on {model['spec']['training_rows']} rows "
+          f"(target: {model['spec']['target_source']}) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+# data/utils/prediction_store.py
+
+import json
+import os
+import re
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data.utils.data_loader import coerce_student_frame
+from data.utils.database import pooled_connection
+
+PREDICTION_DB_PATH = "data/db/predictions.sqlite3"
+
+# Scored batches kept per owner (teacher or student id); older ones are deleted when a new one is saved
+MAX_BATCHES_PER_OWNER = 5
+
+# Rows inserted per executemany call when saving a batch
+WRITE_CHUNK_SIZE = 10_000
+
+# Columns of a batch kept as real columns of the predictions table, so they can be indexed: the
+# default sort of the results roster and the lookup key. Every other value lives in the row's JSON.
+PROMOTED_COLUMNS = ["student_id", "gpa_change"]
+
+BATCH_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# Every batch shares the same tables, so saving one never changes the schema; a row's values
+# are a JSON array in the order of its batch's columns
+PREDICTION_DB_SCHEMA = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    owner_id TEXT,
+    label TEXT,
+    method TEXT,
+    row_count INTEGER NOT NULL,
+    columns TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS batches_owner ON batches (owner_id, created_at);
+CREATE TABLE IF NOT EXISTS predictions (
+    batch_id TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    student_id TEXT,
+    gpa_change REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (batch_id, row)
+);
+CREATE INDEX IF NOT EXISTS predictions_gpa_change ON predictions (batch_id, gpa_change, row);
+CREATE INDEX IF NOT EXISTS predictions_student ON predictions (batch_id, student_id);
+CREATE TABLE IF NOT EXISTS row_hashes (
+    batch_id TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    row_hash INTEGER NOT NULL,
+    PRIMARY KEY (batch_id, student_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS derived_batches (
+    batch_id TEXT PRIMARY KEY,
+    base_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS derived_batches_base ON derived_batches (base_id);
+CREATE TABLE IF NOT EXISTS removed_rows (
+    batch_id TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    PRIMARY KEY (batch_id, student_id)
+) WITHOUT ROWID;
+"""
+
+# The rows a derived batch reads from its base: all but the ones it removed or replaced
+_KEPT_BASE_ROWS = "student_id NOT IN (SELECT student_id FROM removed_rows WHERE batch_id = ?)"
+
+
+def quote_identifier(name):
+    """Quote a column name for SQL; names come from uploaded files, so they are never trusted."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def is_batch_id(value):
+    """Return True if value has the form of an id returned by save_predictions."""
+    return isinstance(value, str) and BATCH_ID_PATTERN.match(value) is not None
+
+
+def store_connection(path=PREDICTION_DB_PATH):
+    """Borrow a pooled connection to the store, creating the file and its tables if needed.
+
+    The database runs in WAL mode so results pages can read while a batch is being written.
+    """
+    return pooled_connection(path, PREDICTION_DB_SCHEMA)
+
+
+def _json_value(value):
+    # numpy scalars left in object columns
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def _insert_rows(conn, batch_id, df, first_row):
+    # Missing values are stored as JSON null; categoricals as their labels, restored on read
+    student_ids = df["student_id"] if "student_id" in df.columns else None
+    gpa_changes = df["gpa_change"] if "gpa_change" in df.columns else None
+    for start in range(0, len(df), WRITE_CHUNK_SIZE):
+        chunk = df.iloc[start:start + WRITE_CHUNK_SIZE]
+        values = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+        ids = [None] * len(chunk) if student_ids is None else student_ids.iloc[start:start + len(chunk)]
+        changes = [None] * len(chunk) if gpa_changes is None else gpa_changes.iloc[start:start + len(chunk)]
+        conn.executemany(
+            "INSERT INTO predictions (batch_id, row, student_id, gpa_change, data) VALUES (?, ?, ?, ?, ?)",
+            ((batch_id, first_row + start + offset, None if pd.isna(student_id) else str(student_id),
+              None if pd.isna(change) else float(change), json.dumps(row, default=_json_value))
+             for offset, (row, student_id, change) in enumerate(zip(values, ids, changes))))
+
+
+def _write_row_hashes(conn, batch_id, student_ids, row_hashes):
+    # SQLite integers are signed, so the unsigned 64-bit hashes are stored with the same bits as int64
+    conn.executemany("INSERT INTO row_hashes VALUES (?, ?, ?)",
+                     ((batch_id, student_id, row_hash) for student_id, row_hash in
+                      zip(map(str, student_ids), np.asarray(row_hashes, dtype=np.uint64).view(np.int64).tolist())))
+
+
+def _record_batch(conn, batch_id, kind, owner_id, label, method, row_count, columns):
+    conn.execute("INSERT INTO batches VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                 (batch_id, kind, owner_id, label, method, row_count, json.dumps(list(map(str, columns))),
+                  time.time()))
+    conn.commit()
+    if owner_id is not None:
+        _prune_batches(conn, kind, owner_id)
+
+
+def save_predictions(df, kind="class", owner_id=None, label=None, method=None, row_hashes=None,
+                     path=PREDICTION_DB_PATH):
+    """Write a scored frame to the store as a new batch and return its batch id.
+
+    kind is "class" for teacher rosters or "student" for a single student's prediction;
+    owner_id is the teacher or student id, label names the data source (e.g. the uploaded
+    file) and method the prediction method. row_hashes, aligned with the rows of df, are
+    kept for a later derive_batch. The batch becomes visible only once fully written.
+    """
+    batch_id = uuid.uuid4().hex
+    with store_connection(path) as conn:
+        _insert_rows(conn, batch_id, df, 0)
+        if row_hashes is not None:
+            _write_row_hashes(conn, batch_id, df["student_id"], row_hashes)
+        _record_batch(conn, batch_id, kind, owner_id, label, method, len(df), df.columns)
+    return batch_id
+
+
+def derive_batch(base_id, drop_ids, df, row_hashes, owner_id=None, label=None, method=None,
+                 path=PREDICTION_DB_PATH):
+    """Save a new batch made of base_id's rows minus drop_ids, followed by the rows of df.
+
+    The new batch stores only its differences from a whole batch (base_id, or the batch base_id
+    was itself derived from): the rows of df and the ids of the rows left out. Reads go through
+    both, so the cost grows with the changes since that whole batch rather than its size. df
+    must have the base batch's columns; row_hashes are its rows' hashes, and the base batch
+    must have been saved with row hashes. Rows keep the base batch's order, with the rows of
+    df at the end.
+    """
+    base = batch_info(base_id, path)
+    if base is None:
+        raise ValueError(f"Unknown batch: {base_id}")
+    batch_id = uuid.uuid4().hex
+    drop_ids = [(batch_id, str(student_id)) for student_id in drop_ids]
+    with store_connection(path) as conn:
+        derivation = _derivation(conn, base_id)
+        whole_id = derivation or base_id
+        if derivation:
+            # A derived base hands its differences on, so batches never chain more than one level
+            conn.execute("INSERT INTO predictions SELECT ?, row, student_id, gpa_change, data FROM predictions "
+                         "WHERE batch_id = ?", (batch_id, base_id))
+            conn.execute("INSERT INTO removed_rows SELECT ?, student_id FROM removed_rows WHERE batch_id = ?",
+                         (batch_id, base_id))
+            conn.execute("INSERT INTO row_hashes SELECT ?, student_id, row_hash FROM row_hashes WHERE batch_id = ?",
+                         (batch_id, base_id))
+        # Dropped rows are either earlier differences or rows of the whole batch, which are left out
+        dropped = conn.executemany("DELETE FROM predictions WHERE batch_id = ? AND student_id = ?", drop_ids).rowcount
+        dropped += conn.executemany("INSERT OR IGNORE INTO removed_rows SELECT ?, student_id FROM predictions "
+                                    "WHERE batch_id = ? AND student_id = ?",
+                                    [(batch_id, whole_id, student_id) for _, student_id in drop_ids]).rowcount
+        conn.executemany("DELETE FROM row_hashes WHERE batch_id = ? AND student_id = ?", drop_ids)
+        # Rows added here are numbered on from the last row of the whole batch and of its differences,
+        # so row order is saved order across both
+        last_row = conn.execute("SELECT MAX(row) FROM predictions WHERE batch_id IN (?, ?)",
+                                (whole_id, batch_id)).fetchone()[0]
+        _insert_rows(conn, batch_id, df[base["columns"]], 0 if last_row is None else last_row + 1)
+        _write_row_hashes(conn, batch_id, df["student_id"], row_hashes)
+        conn.execute("INSERT INTO derived_batches VALUES (?, ?)", (batch_id, whole_id))
+        _record_batch(conn, batch_id, base["kind"], owner_id, label, method, base["row_count"] - dropped + len(df),
+                      base["columns"])
+    return batch_id
+
+
+def _derivation(conn, batch_id):
+    # Id of the whole batch a derived batch reads through, or None for a batch stored whole
+    row = conn.execute("SELECT base_id FROM derived_batches WHERE batch_id = ?", (batch_id,)).fetchone()
+    return row[0] if row else None
+
+
+def _delete_unused_rows(conn, batch_id):
+    # A pruned batch's rows stay until no derived batch reads through them
+    in_use = conn.execute("SELECT 1 FROM batches WHERE batch_id = ? UNION ALL "
+                          "SELECT 1 FROM derived_batches WHERE base_id = ?", (batch_id, batch_id)).fetchone()
+    if in_use is None:
+        conn.execute("DELETE FROM predictions WHERE batch_id = ?", (batch_id,))
+        conn.execute("DELETE FROM row_hashes WHERE batch_id = ?", (batch_id,))
+        conn.execute("DELETE FROM removed_rows WHERE batch_id = ?", (batch_id,))
+
+
+def _prune_batches(conn, kind, owner_id):
+    stale = conn.execute(
+        "SELECT batch_id FROM batches WHERE kind = ? AND owner_id = ? ORDER BY created_at DESC LIMIT -1 OFFSET ?",
+        (kind, owner_id, MAX_BATCHES_PER_OWNER)).fetchall()
+    for (batch_id,) in stale:
+        derivation = _derivation(conn, batch_id)
+        conn.execute("DELETE FROM batches WHERE batch_id = ?", (batch_id,))
+        conn.execute("DELETE FROM derived_batches WHERE batch_id = ?", (batch_id,))
+        _delete_unused_rows(conn, batch_id)
+        if derivation is not None:
+            _delete_unused_rows(conn, derivation)
+
+
+def batch_info(batch_id, path=PREDICTION_DB_PATH):
+    """Return the batch's metadata as a dict (columns decoded to a list), or None if it doesn't exist."""
+    if not is_batch_id(batch_id) or not os.path.exists(path):
+        return None
+    with store_connection(path) as conn:
+        cursor = conn.execute("SELECT * FROM batches WHERE batch_id = ?", (batch_id,))
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    info = dict(zip([column[0] for column in cursor.description], row))
+    info["columns"] = json.loads(info["columns"])
+    return info
+
+
+def latest_batch(kind, owner_id, label=None, method=None, path=PREDICTION_DB_PATH):
+    """Id of the owner's most recent batch of this kind, label and method, or None."""
+    if not os.path.exists(path):
+        return None
+    with store_connection(path) as conn:
+        row = conn.execute(
+            "SELECT batch_id FROM batches WHERE kind = ? AND owner_id = ? AND label IS ? AND method IS ? "
+            "ORDER BY created_at DESC LIMIT 1", (kind, owner_id, label, method)).fetchone()
+    return row[0] if row else None
+
+
+def _batch_layout(conn, batch_id):
+    # (columns, base_id) of a saved batch; base_id is None unless it was derived
+    row = conn.execute("SELECT b.columns, d.base_id FROM batches b LEFT JOIN derived_batches d USING (batch_id) "
+                       "WHERE b.batch_id = ?", (batch_id,)).fetchone()
+    if row is None:
+        raise ValueError(f"Unknown batch: {batch_id}")
+    return json.loads(row[0]), row[1]
+
+
+def _column_value(index, column):
+    # SQL for one column of a row: promoted columns by name, the rest by position in the JSON array
+    return column if column in PROMOTED_COLUMNS else f"json_extract(data, '$[{int(index)}]')"
+
+
+def _batch_rows(columns, condition="", index=None):
+    """SELECT of one batch's rows (batch id as its first parameter) with each column under its own
+    name, plus the raw row as _data and its position as _row.
+
+    Promoted columns come from their indexed columns, the rest from the JSON array by position, so
+    only quoted column names and integers are ever written into the SQL. SQLite flattens the
+    subquery into the caller's query, so filters and sorts still use the indexes; index names one
+    for SQLite to use when it would otherwise pick a worse one.
+    """
+    values = ", ".join(f"{_column_value(index, column)} AS {quote_identifier(column)}"
+                       for index, column in enumerate(columns))
+    return (f"(SELECT {values}, data AS _data, row AS _row FROM predictions"
+            + (f" INDEXED BY {index}" if index else "") + " WHERE batch_id = ?"
+            + (f" AND {condition})" if condition else ")"))
+
+
+def _decode_rows(data, columns):
+    # One json.loads for the whole page instead of one per row
+    return pd.DataFrame(json.loads("[" + ",".join(data) + "]"), columns=columns)
+
+
+def read_row_hashes(batch_id, path=PREDICTION_DB_PATH):
+    """Return the batch's student ids and row hashes (uint64) as a frame, or None if it has none."""
+    with store_connection(path) as conn:
+        if conn.execute("SELECT 1 FROM row_hashes WHERE batch_id = ? LIMIT 1", (batch_id,)).fetchone() is None:
+            return None
+        derivation = _derivation(conn, batch_id)
+        if derivation is None:
+            df = pd.read_sql_query("SELECT student_id, row_hash FROM row_hashes WHERE batch_id = ?", conn,
+                                   params=(batch_id,))
+        else:
+            df = pd.read_sql_query(
+                "SELECT student_id, row_hash FROM row_hashes WHERE batch_id = ? AND "
+                + _KEPT_BASE_ROWS + " UNION ALL SELECT student_id, row_hash FROM row_hashes WHERE batch_id = ?",
+                conn, params=(derivation, batch_id, batch_id))
+    df["row_hash"] = df["row_hash"].to_numpy(dtype=np.int64).view(np.uint64)
+    return df
+
+
+def count_rows(batch_id, where="", params=(), path=PREDICTION_DB_PATH):
+    """Number of rows of the batch matching the optional SQL condition where."""
+    condition = f" WHERE {where}" if where else ""
+    with store_connection(path) as conn:
+        columns, base_id = _batch_layout(conn, batch_id)
+        rows = _batch_rows(columns)
+        if base_id is None:
+            return conn.execute(f"SELECT COUNT(*) FROM {rows}{condition}", (batch_id, *params)).fetchone()[0]
+        # Counted per batch so each count can use the indexes: the base, less its left-out rows, plus
+        # the batch's own rows
+        # A few left-out ids: looked up by id, not by scanning the rows that match the condition
+        removed = _batch_rows(columns, "student_id IN (SELECT student_id FROM removed_rows WHERE batch_id = ?)",
+                              "predictions_student")
+        sql = (f"SELECT (SELECT COUNT(*) FROM {rows}{condition}) - (SELECT COUNT(*) FROM {removed}{condition}) "
+               f"+ (SELECT COUNT(*) FROM {rows}{condition})")
+        return conn.execute(sql, (base_id, *params, base_id, batch_id, *params, batch_id, *params)).fetchone()[0]
+
+
+def read_rows(batch_id, columns=None, where="", params=(), order_by=None, descending=False, offset=0, limit=None,
+              path=PREDICTION_DB_PATH):
+    """Read selected columns and rows of a batch, in the student schema.
+
+    where is an SQL condition with ? placeholders filled from params, naming the batch's columns
+    with quote_identifier. Rows keep their saved order unless order_by names a column; ties keep
+    saved order, reversed when descending.
+    """
+    direction = "DESC" if descending else "ASC"
+    condition = f" WHERE {where}" if where else ""
+    sort = f"{quote_identifier(order_by)} AS _sort, " if order_by else ""
+    order = f"_sort {direction}, " if order_by else ""
+    with store_connection(path) as conn:
+        batch_columns, base_id = _batch_layout(conn, batch_id)
+        if base_id is None:
+            sql = f"SELECT {sort}_data, _row FROM {_batch_rows(batch_columns)}{condition}"
+            sql_params = (batch_id, *params)
+        else:
+            # The base's kept rows, then the batch's own, numbered on in one row sequence. As a
+            # compound query SQLite merges the two along their indexes when sorting
+            sql = (f"SELECT {sort}_data, _row FROM {_batch_rows(batch_columns, _KEPT_BASE_ROWS)}{condition} "
+                   f"UNION ALL SELECT {sort}_data, _row FROM {_batch_rows(batch_columns)}{condition}")
+            sql_params = (base_id, batch_id, *params, batch_id, *params)
+        sql += f" ORDER BY {order}_row {direction}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)} OFFSET {int(offset)}"
+        data = [row[-2] for row in conn.execute(sql, sql_params)]
+    df = _decode_rows(data, batch_columns)
+    return coerce_student_frame(df[list(columns)] if columns else df)
+
+
+def column_range(batch_id, column, path=PREDICTION_DB_PATH):
+    """Return (min, max) of a numeric column of the batch, read from its index when there is one."""
+    quoted = quote_identifier(column)
+    with store_connection(path) as conn:
+        columns, base_id = _batch_layout(conn, batch_id)
+        rows = _batch_rows(columns)
+        if base_id is None:
+            return conn.execute(f"SELECT MIN({quoted}), MAX({quoted}) FROM {rows}", (batch_id,)).fetchone()
+        # One MIN and one MAX per batch, each answered from the index
+        kept = _batch_rows(columns, _KEPT_BASE_ROWS)
+        return conn.execute(f"SELECT MIN(value), MAX(value) FROM (SELECT MIN({quoted}) AS value FROM {kept} "
+                            f"UNION ALL SELECT MAX({quoted}) FROM {kept} UNION ALL SELECT MIN({quoted}) FROM {rows} "
+                            f"UNION ALL SELECT MAX({quoted}) FROM {rows})",
+                            (base_id, batch_id, base_id, batch_id, batch_id, batch_id)).fetchone()
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _cached_batch_frame(batch_id, columns, path):
+    # Batches never change once saved, so the id alone is a safe cache key
+    return read_rows(batch_id, list(columns) if columns else None, path=path)
+
+
+def load_batch(batch_id, columns=None, path=PREDICTION_DB_PATH):
+    """Return a whole batch (or some of its columns) as a frame shared by every session.
+
+    The frame is loaded once per process and returned by reference, so callers must not modify it.
+    """
+    return _cached_batch_frame(batch_id, tuple(columns) if columns else None, path)
@@ -0,0 +1,66 @@
+# data/utils/resources.py
+
+import importlib
+import os
+import threading
+import time
+
+import streamlit as st
+
+# Libraries that pages import lazily, loaded ahead of their first use by the warm-up
+WARM_MODULES = ["seaborn", "sklearn.linear_model"]
+
+
+def warm_resources():
+    """Load the heavy libraries and shared caches the input and results pages rely on.
+
+    Returns the seconds each step took. Everything warmed here is cached per process
+    (sys.modules, st.cache_data, st.cache_resource), so pages find it ready. Pages don't wait
+    for the warm-up: a page asking for a resource that is still being built waits on the same
+    lock instead (Streamlit's per-key cache lock, or the thumbnail build lock), so each one is
+    built once, and files are written through unique temporary names.
+    """
+    # Imported here so importing this module stays cheap for the pages that start the warm-up
+    from data.utils.assets import prepare_thumbnails
+    from data.utils.data_loader import SAMPLE_DATA_PATH, load_student_data
+    from data.utils.database import ensure_database
+    from data.utils.figures import load_pyplot
+    from data.utils.ml_utils import get_linear_model
+
+    steps = [("thumbnails", prepare_thumbnails), ("matplotlib", load_pyplot)]
+    steps += [(name, lambda name=name: importlib.import_module(name)) for name in WARM_MODULES]
+    if os.path.exists(SAMPLE_DATA_PATH):
+        steps += [
+            ("sample_data", lambda: load_student_data(SAMPLE_DATA_PATH)),
+            ("student_database", ensure_database),
+        ]
+    steps.append(("linear_model", get_linear_model))
+
+    timings = {}
+    for name, step in steps:
+        start = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def _run_warmup(status):
+    start = time.perf_counter()
+    try:
+        status["timings"] = warm_resources()
+    except Exception as e:
+        # The pages load whatever is missing on demand, so a failed warm-up only costs speed
+        status["error"] = str(e)
+    status["seconds"] = time.perf_counter() - start
+
+
+@st.cache_resource(show_spinner=False)
+def start_warmup():
+    """Start warm_resources in a background thread, once per server process.
+
+    Returns a status dict that gains timings (or error) and seconds once the warm-up ends.
+    Call it from the entry pages so the first visitor does not wait on the warm-up.
+    """
+    status = {"timings": None, "error": None, "seconds": None}
+    threading.Thread(target=_run_warmup, args=(status,), name="resource-warmup", daemon=True).start()
+    return status
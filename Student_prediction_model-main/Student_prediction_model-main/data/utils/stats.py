@@ -0,0 +1,116 @@
+# data/utils/stats.py
+
+import numpy as np
+import pandas as pd
+
+from data.utils.data_loader import ORDINAL_CATEGORIES, cache_by_fingerprint
+
+# Fixed histogram bins: (column, bin edges, labels). Each bin includes its right edge,
+# and the first bin also includes its left edge.
+HISTOGRAM_BINS = [
+    ("previous_gpa", [0, 1, 2, 3, 4], ["0-1", "1-2", "2-3", "3-4"]),
+    ("sleep_hours", [4, 6, 7, 8, 9, 12], ["4-6 hrs", "6-7 hrs", "7-8 hrs", "8-9 hrs", "9+ hrs"]),
+]
+
+PERCENTILES = [25, 50, 75]
+
+
+def numeric_code_column(column):
+    """Name of the numeric column derived from an ordinal column, e.g. behavior_score_numeric."""
+    return f"{column}_numeric"
+
+
+def analysis_matrix(df):
+    """Return (X, numeric_columns, ordinal_columns).
+
+    X holds the numeric columns of df followed by the codes of its ordinal columns.
+    Ordinal levels are coded 1, 2, ... in level order; unknown labels and gaps are NaN.
+    """
+    numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+    ordinal_columns = [column for column in ORDINAL_CATEGORIES if column in df.columns]
+
+    X = np.empty((len(df), len(numeric_columns) + len(ordinal_columns)), dtype=np.float64)
+    for j, column in enumerate(numeric_columns):
+        X[:, j] = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+    for j, column in enumerate(ordinal_columns, start=len(numeric_columns)):
+        codes = pd.Categorical(df[column], categories=ORDINAL_CATEGORIES[column]).codes
+        X[:, j] = np.where(codes >= 0, codes + 1, np.nan)
+    return X, numeric_columns, ordinal_columns
+
+
+def _histogram(values, edges, labels):
+    # side="left" puts a value equal to an edge in the bin ending at that edge
+    bins = np.searchsorted(edges, values, side="left") - 1
+    bins[values == edges[0]] = 0
+    inside = (bins >= 0) & (bins < len(labels))
+    counts = np.bincount(bins[inside], minlength=len(labels))
+    return pd.Series(counts, index=labels, name="count")
+
+
+def compute_class_stats(df):
+    """Compute every class-level aggregate the dashboards show in one pass over the data.
+
+    Returns a dict with:
+        rows: number of students
+        describe: count/mean/std/min/percentiles/max of each numeric column, like df.describe()
+        corr: correlation matrix of the numeric columns plus the codes of the ordinal columns
+        histograms: counts per fixed bin, keyed by column
+        category_counts: counts per level of each ordinal column, in level order
+        positive_counts: number of positive values per numeric column
+    """
+    X, numeric_columns, ordinal_columns = analysis_matrix(df)
+    numeric = X[:, :len(numeric_columns)]
+    corr_columns = numeric_columns + [numeric_code_column(column) for column in ordinal_columns]
+
+    category_counts = {}
+    for j, column in enumerate(ordinal_columns, start=len(numeric_columns)):
+        levels = ORDINAL_CATEGORIES[column]
+        codes = X[:, j]
+        counts = np.bincount(codes[~np.isnan(codes)].astype(np.intp) - 1, minlength=len(levels))
+        category_counts[column] = pd.Series(counts, index=levels, name="count")
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        describe = pd.DataFrame(
+            np.vstack([
+                np.count_nonzero(~np.isnan(numeric), axis=0),
+                np.nanmean(numeric, axis=0),
+                np.nanstd(numeric, axis=0, ddof=1),
+                np.nanmin(numeric, axis=0),
+                np.nanpercentile(numeric, PERCENTILES, axis=0),
+                np.nanmax(numeric, axis=0),
+            ]) if len(df) else np.full((8, len(numeric_columns)), np.nan),
+            index=["count", "mean", "std", "min"] + [f"{p}%" for p in PERCENTILES] + ["max"],
+            columns=numeric_columns,
+        )
+
+        if np.isnan(X).any():
+            # Pairwise-complete correlations only when there are gaps to work around
+            corr = pd.DataFrame(X, columns=corr_columns).corr()
+        else:
+            corr = pd.DataFrame(np.atleast_2d(np.corrcoef(X, rowvar=False)), index=corr_columns, columns=corr_columns)
+
+    histograms = {
+        column: _histogram(df[column].to_numpy(dtype=np.float64), edges, labels)
+        for column, edges, labels in HISTOGRAM_BINS if column in df.columns
+    }
+
+    return {
+        "rows": len(df),
+        "describe": describe,
+        "corr": corr,
+        "histograms": histograms,
+        "category_counts": category_counts,
+        "positive_counts": pd.Series((numeric > 0).sum(axis=0), index=numeric_columns),
+    }
+
+
+_cached_class_stats = cache_by_fingerprint(compute_class_stats)
+
+
+def class_stats(df, fingerprint=None):
+    """Return compute_class_stats(df), computed once per distinct frame contents.
+
+    fingerprint identifies the contents (see frame_fingerprint; a batch id works too) and is
+    computed from df when omitted.
+    """
+    return _cached_class_stats(df, fingerprint=fingerprint)
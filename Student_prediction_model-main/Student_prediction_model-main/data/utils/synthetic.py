@@ -0,0 +1,217 @@
+# data/utils/synthetic.py
+
+import argparse
+import os
+import time
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; without it only CSV can be written, through pandas
+    pa = None
+
+from data.utils.data_loader import ORDINAL_CATEGORIES
+from data.utils.files import file_format
+
+# Rows generated at a time. Each chunk draws from its own seeded stream, so the output
+# depends on the seed and this size only, and memory stays flat whatever the row count.
+CHUNK_ROWS = 100_000
+
+SCHEMAS = ["students", "profiles"]
+FORMATS = ["csv", "parquet"]
+
+SUBJECTS = ["Mathematics", "Science", "English", "Social Studies"]
+GRADE_LEVELS = ["Elementary", "Middle School", "High School", "College"]
+
+FIRST_NAMES = [
+    "Abigail", "Aiden", "Amelia", "Benjamin", "Carol", "Charlotte", "Daniel", "Emily", "Ethan", "Grace",
+    "Hannah", "Isaac", "James", "Linda", "Lucas", "Maria", "Mason", "Noah", "Olivia", "Paul",
+    "Priya", "Rachel", "Rahul", "Sofia", "Stephen", "Thomas", "Wei", "William", "Yusuf", "Zoe",
+]
+LAST_NAMES = [
+    "Alexander", "Brown", "Chen", "Coleman", "Das", "Garcia", "Hayes", "Hughes", "Johnson", "Kim",
+    "Lee", "Martin", "Nguyen", "Parker", "Patel", "Reed", "Sanders", "Sarkar", "Smith", "Thomas",
+    "Walker", "Washington", "Watson", "Williams", "Wilson", "Wright", "Young",
+]
+
+# Every student has a latent engagement score (standard normal). Each numeric column is
+# mean + std * (loading * engagement + noise), with the noise scaled so the column's own
+# variance stays std**2; two columns then correlate by roughly the product of their loadings.
+# Loadings, means and shares are fitted to data/sample_student_data.csv.
+NUMERIC_COLUMNS = {
+    # column: (mean, std, loading, (min, max), decimals)
+    "attendance": (87.0, 11.0, 0.70, (50, 100), 0),
+    "study_hours": (2.5, 1.1, 0.68, (0.5, 6.0), 1),
+    "previous_gpa": (2.9, 0.65, 0.78, (1.0, 4.1), 1),
+    "sleep_hours": (7.3, 1.4, 0.25, (4, 12), 0),
+}
+# Ordinal columns are cut from the same kind of latent value at the normal quantiles of
+# each level's share, lowest level first
+ORDINAL_COLUMNS = {
+    # column: (loading, level shares)
+    "class_participation": (0.60, [0.31, 0.41, 0.28]),
+    "homework_completion": (0.62, [0.31, 0.41, 0.28]),
+    "behavior_score": (0.65, [0.19, 0.26, 0.38, 0.17]),
+    "extracurricular": (0.50, [0.22, 0.24, 0.29, 0.25]),
+    "stress_level": (-0.15, [0.07, 0.14, 0.32, 0.31, 0.16]),
+}
+AGE_RANGE = (14, 26)
+# Subject scores load on engagement through a shared academic ability score
+SCORE_MEAN = 80.0
+SCORE_STD = 9.0
+SCORE_RANGE = (40, 100)
+ABILITY_LOADING = 0.6
+SUBJECT_LOADING = 0.7
+
+# Seed stream numbers within a chunk: ids, names and engagement are shared by both schemas,
+# so a students file and a profiles file written with the same seed describe the same students
+_SHARED_STREAM = 0
+_SCHEMA_STREAMS = {"students": 1, "profiles": 2}
+
+
+def _cutpoints(shares):
+    return [NormalDist().inv_cdf(total) for total in np.cumsum(shares)[:-1]]
+
+
+_ORDINAL_CUTPOINTS = {column: _cutpoints(shares) for column, (_, shares) in ORDINAL_COLUMNS.items()}
+
+
+def _latent(rng, engagement, loading):
+    return loading * engagement + np.sqrt(1 - loading ** 2) * rng.standard_normal(len(engagement))
+
+
+def _shared_columns(seed, chunk_index, start, rows):
+    rng = np.random.default_rng([seed, chunk_index, _SHARED_STREAM])
+    ids = "S" + pd.Series(np.arange(start + 1, start + rows + 1)).astype(str).str.zfill(7)
+    first = np.asarray(FIRST_NAMES, dtype=object)[rng.integers(len(FIRST_NAMES), size=rows)]
+    last = np.asarray(LAST_NAMES, dtype=object)[rng.integers(len(LAST_NAMES), size=rows)]
+    frame = pd.DataFrame({"student_id": ids.to_numpy(dtype=object), "name": first + " " + last})
+    return frame, rng.standard_normal(rows)
+
+
+def _student_columns(rng, engagement, frame):
+    rows = len(engagement)
+    frame["age"] = rng.integers(AGE_RANGE[0], AGE_RANGE[1] + 1, size=rows, dtype=np.int8)
+    frame["gender"] = pd.Categorical.from_codes(rng.integers(2, size=rows), ["F", "M"])
+    for column, (mean, std, loading, (low, high), decimals) in NUMERIC_COLUMNS.items():
+        values = np.clip(mean + std * _latent(rng, engagement, loading), low, high).round(decimals)
+        frame[column] = values.astype(np.int8) if decimals == 0 else values
+    for column, (loading, _) in ORDINAL_COLUMNS.items():
+        codes = np.searchsorted(_ORDINAL_CUTPOINTS[column], _latent(rng, engagement, loading))
+        frame[column] = pd.Categorical.from_codes(codes, ORDINAL_CATEGORIES[column], ordered=True)
+    # Keep the bundled sample's column order
+    order = ["student_id", "name", "age", "gender", "attendance", "study_hours", "previous_gpa",
+             "class_participation", "homework_completion", "behavior_score", "sleep_hours", "extracurricular",
+             "stress_level"]
+    return frame[order]
+
+
+def _profile_columns(rng, engagement, frame):
+    rows = len(engagement)
+    frame["grade_level"] = pd.Categorical.from_codes(rng.integers(len(GRADE_LEVELS), size=rows), GRADE_LEVELS)
+    ability = _latent(rng, engagement, ABILITY_LOADING)
+    for subject in SUBJECTS:
+        scores = SCORE_MEAN + SCORE_STD * _latent(rng, ability, SUBJECT_LOADING)
+        frame[subject] = np.clip(scores, *SCORE_RANGE).round().astype(np.int8)
+    return frame
+
+
+def generate_chunks(rows, schema="students", seed=0):
+    """Yield frames of at most CHUNK_ROWS synthetic rows, rows in total, in the given schema.
+
+    schema is "students" (the columns of data/sample_student_data.csv) or "profiles" (those
+    of data/student_profiles.csv). The same seed always gives the same rows, with ids
+    S0000001, S0000002, ... shared by both schemas.
+    """
+    if schema not in SCHEMAS:
+        raise ValueError(f"Unknown schema: {schema}")
+    if rows < 1:
+        raise ValueError("A roster needs at least one row.")
+    build = _student_columns if schema == "students" else _profile_columns
+    for chunk_index, start in enumerate(range(0, rows, CHUNK_ROWS)):
+        frame, engagement = _shared_columns(seed, chunk_index, start, min(CHUNK_ROWS, rows - start))
+        rng = np.random.default_rng([seed, chunk_index, _SCHEMA_STREAMS[schema]])
+        yield build(rng, engagement, frame)
+
+
+def generate_roster(rows, schema="students", seed=0):
+    """Return rows synthetic rows as one frame; use write_roster for rosters that don't fit in memory."""
+    return pd.concat(generate_chunks(rows, schema, seed), ignore_index=True)
+
+
+def write_roster(path, rows, schema="students", seed=0, fmt=None):
+    """Write rows synthetic rows to path as CSV or Parquet, one chunk at a time.
+
+    fmt defaults to the one implied by the extension; Parquet needs pyarrow. Returns the
+    number of rows written.
+    """
+    fmt = fmt or file_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    if rows < 1:
+        # Checked before the file is created; generate_chunks would only raise once it is open
+        raise ValueError("A roster needs at least one row.")
+    if fmt == "parquet" and pa is None:
+        raise ImportError("Writing Parquet needs pyarrow: pip install pyarrow")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if fmt == "csv" and pa is None:
+        with open(path, "w", newline="") as f:
+            for chunk_index, chunk in enumerate(generate_chunks(rows, schema, seed)):
+                chunk.to_csv(f, header=chunk_index == 0, index=False)
+        return rows
+
+    # pyarrow writes CSV several times faster than pandas, so it is used for both formats when present
+    writer = None
+    f = open(path, "wb") if fmt == "csv" else None
+    try:
+        for chunk in generate_chunks(rows, schema, seed):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if fmt == "csv":
+                # Categories are written as their labels
+                table = table.cast(pa.schema([
+                    pa.field(field.name, pa.string()) if pa.types.is_dictionary(field.type) else field
+                    for field in table.schema]))
+            if writer is None and fmt == "parquet":
+                writer = pq.ParquetWriter(path, table.schema)
+            elif writer is None:
+                # pyarrow quotes header names, so the header is written as pandas would; generated
+                # values never contain commas or quotes, so nothing else needs quoting either
+                f.write((",".join(table.column_names) + "\n").encode())
+                writer = pa_csv.CSVWriter(f, table.schema, write_options=pa_csv.WriteOptions(
+                    include_header=False, quoting_style="none"))
+            # Parquet files get one row group per chunk; categories are fixed, so every chunk has the same schema
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+        if f is not None:
+            f.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a large synthetic roster for load and performance testing.")
+    parser.add_argument("output", help="file to write; .parquet or .pq writes Parquet, anything else CSV")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--schema", choices=SCHEMAS, default="students",
+                        help="student records or student profiles with subject scores")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=FORMATS, help="override the format implied by the extension")
+    args = parser.parse_args()
+    if args.rows < 1:
+        parser.error("--rows must be at least 1")
+
+    start = time.perf_counter()
+    rows = write_roster(args.output, args.rows, args.schema, args.seed, args.format)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {rows:,} {args.schema} rows to {args.output} in {elapsed:.1f} s "
+          f"({os.path.getsize(args.output) / 1024 ** 2:,.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
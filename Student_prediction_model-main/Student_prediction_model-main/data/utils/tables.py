@@ -0,0 +1,196 @@
+# data/utils/tables.py
+
+import math
+
+import numpy as np
+import streamlit as st
+
+from data.utils.data_loader import cache_by_fingerprint, frame_fingerprint
+from data.utils.prediction_store import batch_info, column_range, count_rows, quote_identifier, read_rows
+
+DEFAULT_PAGE_SIZE = 50
+
+# GPA bands offered as a filter: each band includes its upper edge, the first also its lower edge,
+# and "4+" holds weighted GPAs above 4
+GPA_BAND_EDGES = [0, 1, 2, 3, 4]
+GPA_BAND_LABELS = ["0-1", "1-2", "2-3", "3-4", "4+"]
+
+# Columns the roster table can be sorted by, when present
+SORT_COLUMNS = ["student_id", "name", "previous_gpa", "predicted_gpa", "gpa_change"]
+
+
+def paginated_dataframe(df, key, page_size=DEFAULT_PAGE_SIZE):
+    """Render df one page at a time so only the visible rows are sent to the browser."""
+    start, end = _page_controls(len(df), key, page_size)
+    st.dataframe(df.iloc[start:end], hide_index=True)
+
+
+def paginated_query(row_count, read_page, key, page_size=DEFAULT_PAGE_SIZE):
+    """Render a table of row_count rows read one page at a time by read_page(offset, limit)."""
+    start, end = _page_controls(row_count, key, page_size)
+    st.dataframe(read_page(start, end - start), hide_index=True)
+
+
+def _page_controls(row_count, key, page_size):
+    # Returns the [start, end) row range of the selected page
+    page_count = max(1, math.ceil(row_count / page_size))
+    page = 1
+    if page_count > 1:
+        # The row count is part of the key so a filter that shrinks the table starts again at page 1
+        page = st.number_input(f"Page (of {page_count:,})", min_value=1, max_value=page_count, value=1, step=1,
+                               key=f"{key}_page_{row_count}")
+    start = (page - 1) * page_size
+    end = min(start + page_size, row_count)
+    if page_count > 1:
+        st.caption(f"Showing rows {start + 1:,}-{end:,} of {row_count:,}")
+    return start, end
+
+
+def gpa_bands(gpa):
+    """Return the index into GPA_BAND_LABELS for each GPA value."""
+    bands = np.searchsorted(GPA_BAND_EDGES, np.asarray(gpa, dtype=np.float64), side="left") - 1
+    return np.clip(bands, 0, len(GPA_BAND_LABELS) - 1)
+
+
+def _sort_index(df, column):
+    # Stable ascending order of the column; descending views walk it backwards
+    return df[column].argsort(kind="stable").to_numpy()
+
+
+def _column_gpa_bands(df, column):
+    return gpa_bands(df[column].to_numpy(dtype=np.float64))
+
+
+_cached_sort_index = cache_by_fingerprint(_sort_index, max_entries=32)
+_cached_gpa_bands = cache_by_fingerprint(_column_gpa_bands)
+
+
+def _roster_controls(key, sort_columns, band_column, change_bounds, default_sort, descending):
+    # Sort and filter widgets shared by the in-memory and stored rosters.
+    # Returns (search, bands, sort_by, sort_descending, change_range).
+    with st.expander("Sort and filter", expanded=False):
+        col1, col2 = st.columns(2)
+        with col1:
+            search = st.text_input("Search by student ID or name", key=f"{key}_search").strip()
+            bands = []
+            if band_column is not None:
+                bands = st.multiselect(f"GPA band ({band_column.replace('_', ' ')})", GPA_BAND_LABELS,
+                                       key=f"{key}_bands")
+        with col2:
+            sort_by = st.selectbox("Sort by", sort_columns, key=f"{key}_sort",
+                                   index=sort_columns.index(default_sort) if default_sort in sort_columns else 0)
+            sort_descending = st.checkbox("Descending", value=descending, key=f"{key}_descending")
+            change_range = None
+            if change_bounds is not None:
+                low = math.floor(float(change_bounds[0]) * 10) / 10
+                high = math.ceil(float(change_bounds[1]) * 10) / 10
+                if low < high:
+                    change_range = st.slider("GPA change", min_value=low, max_value=high, value=(low, high),
+                                             step=0.1, key=f"{key}_change")
+    return search, bands, sort_by, sort_descending, change_range
+
+
+def _band_column(columns):
+    # GPA bands filter on predicted GPA when present, otherwise previous GPA
+    for column in ("predicted_gpa", "previous_gpa"):
+        if column in columns:
+            return column
+    return None
+
+
+def roster_table(df, key, columns=None, default_sort="student_id", descending=False, page_size=DEFAULT_PAGE_SIZE,
+                 fingerprint=None):
+    """Render a sortable, filterable roster that only sends the visible page to the browser.
+
+    Sorting uses a precomputed sort index per column and filtering works on boolean masks,
+    so no sorted or filtered copy of the frame is ever built. Filters cover student id/name
+    search, GPA band (predicted GPA when present, otherwise previous GPA) and GPA change range.
+    fingerprint identifies df's contents (see frame_fingerprint) and keys the sort indexes;
+    pass the one computed when df was loaded, or it is recomputed on every rerun.
+    """
+    columns = [column for column in (columns or df.columns) if column in df.columns]
+    sort_columns = [column for column in SORT_COLUMNS if column in df.columns]
+    band_column = _band_column(df.columns)
+    change_bounds = None
+    if "gpa_change" in df.columns and len(df):
+        change_bounds = (df["gpa_change"].min(), df["gpa_change"].max())
+    fingerprint = fingerprint or frame_fingerprint(df)
+
+    search, bands, sort_by, sort_descending, change_range = _roster_controls(
+        key, sort_columns, band_column, change_bounds, default_sort, descending)
+
+    mask = np.ones(len(df), dtype=bool)
+    if search:
+        matches = df["student_id"].astype("string").str.contains(search, case=False, regex=False)
+        if "name" in df.columns:
+            matches |= df["name"].astype("string").str.contains(search, case=False, regex=False)
+        mask &= matches.fillna(False).to_numpy(dtype=bool)
+    if bands:
+        band_index = _cached_gpa_bands(df, band_column, fingerprint=fingerprint)
+        mask &= np.isin(band_index, [GPA_BAND_LABELS.index(band) for band in bands])
+    if change_range is not None:
+        changes = df["gpa_change"].to_numpy(dtype=np.float64)
+        mask &= (changes >= change_range[0]) & (changes <= change_range[1])
+
+    order = _cached_sort_index(df, sort_by, fingerprint=fingerprint) if sort_by else np.arange(len(df))
+    if sort_descending:
+        order = order[::-1]
+    if not mask.all():
+        order = order[mask[order]]
+
+    start, end = _page_controls(len(order), key, page_size)
+    st.dataframe(df.iloc[order[start:end]][columns], hide_index=True)
+
+
+def _band_condition(column, band):
+    # SQL for one GPA band, with the same edges as gpa_bands
+    i = GPA_BAND_LABELS.index(band)
+    conditions, params = [], []
+    if i > 0:
+        conditions.append(f"{quote_identifier(column)} > ?")
+        params.append(GPA_BAND_EDGES[i])
+    if i < len(GPA_BAND_EDGES) - 1:
+        conditions.append(f"{quote_identifier(column)} <= ?")
+        params.append(GPA_BAND_EDGES[i + 1])
+    return " AND ".join(conditions), params
+
+
+def stored_roster_table(batch_id, key, columns=None, default_sort="student_id", descending=False,
+                        page_size=DEFAULT_PAGE_SIZE):
+    """Render the same roster as roster_table for a batch in the prediction store.
+
+    Filtering, sorting and paging run as SQL, so only the visible page of the displayed
+    columns is ever read back, whatever the size of the batch.
+    """
+    batch_columns = batch_info(batch_id)["columns"]
+    columns = [column for column in (columns or batch_columns) if column in batch_columns]
+    sort_columns = [column for column in SORT_COLUMNS if column in batch_columns]
+    band_column = _band_column(batch_columns)
+    change_bounds = column_range(batch_id, "gpa_change") if "gpa_change" in batch_columns else None
+    if change_bounds is not None and change_bounds[0] is None:
+        change_bounds = None
+
+    search, bands, sort_by, sort_descending, change_range = _roster_controls(
+        key, sort_columns, band_column, change_bounds, default_sort, descending)
+
+    conditions, params = [], []
+    if search:
+        pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        search_columns = [column for column in ("student_id", "name") if column in batch_columns]
+        conditions.append("(" + " OR ".join(f"{quote_identifier(column)} LIKE ? ESCAPE '\\'"
+                                             for column in search_columns) + ")")
+        params += [pattern] * len(search_columns)
+    if bands:
+        band_conditions = [_band_condition(band_column, band) for band in bands]
+        conditions.append("(" + " OR ".join(f"({condition})" for condition, _ in band_conditions) + ")")
+        params += [param for _, band_params in band_conditions for param in band_params]
+    if change_range is not None:
+        conditions.append(f"{quote_identifier('gpa_change')} BETWEEN ? AND ?")
+        params += list(change_range)
+    where = " AND ".join(conditions)
+
+    row_count = count_rows(batch_id, where, params)
+    start, end = _page_controls(row_count, key, page_size)
+    page = read_rows(batch_id, columns, where, params, order_by=sort_by, descending=sort_descending,
+                     offset=start, limit=end - start)
+    st.dataframe(page, hide_index=True)
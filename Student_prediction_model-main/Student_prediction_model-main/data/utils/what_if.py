@@ -0,0 +1,80 @@
+# data/utils/what_if.py
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data.utils.ml_utils import STUDENT_MODEL_FEATURES, predict_student_outcomes
+
+# Values each what-if control can take; the student's own value is always added to its axis
+SCENARIO_AXES = {
+    "study_hours": np.round(np.arange(0, 6.01, 0.5), 1),
+    "attendance": np.arange(0, 101, 5),
+    "sleep_hours": np.arange(4, 13),
+    "class_participation": np.array(["Low", "Medium", "High"], dtype=object),
+    "homework_completion": np.array(["Low", "Medium", "High"], dtype=object),
+}
+
+# Inputs of the student model; together they are the feature vector a grid is cached on
+SCENARIO_INPUTS = ["age"] + STUDENT_MODEL_FEATURES
+
+# Grids kept in memory at once, one per distinct feature vector
+GRID_CACHE_ENTRIES = 256
+
+
+def feature_vector(record):
+    """Hashable (column, value) pairs of the model inputs in record, with plain Python values.
+
+    Numbers are rounded to 4 decimals, undoing float32 storage noise (4.3 is read back from the
+    prediction store as 4.300000190734863) so equal inputs share a grid.
+    """
+    return tuple((column, record[column] if isinstance(record[column], str) else round(float(record[column]), 4))
+                 for column in SCENARIO_INPUTS)
+
+
+def scenario_axes(features):
+    """The axes of the grid for this feature vector: SCENARIO_AXES with the student's own values."""
+    values = dict(features)
+    axes = {}
+    for column, axis in SCENARIO_AXES.items():
+        if axis.dtype == object:
+            axes[column] = axis
+        else:
+            axes[column] = np.union1d(axis, [values[column]])
+    return axes
+
+
+def compute_scenario_grid(features):
+    """Predict GPA and behavior for every combination of the scenario axes in one batched call.
+
+    Returns {"axes": scenario_axes(features), "predicted_gpa": array, "predicted_behavior": array},
+    the arrays having one dimension per axis, in the order of SCENARIO_AXES.
+    """
+    axes = scenario_axes(features)
+    mesh = np.meshgrid(*axes.values(), indexing="ij")
+    shape = mesh[0].shape
+    # Every scenario keeps the student's other inputs and varies only the axis columns
+    scenarios = pd.DataFrame({column: np.full(mesh[0].size, value, dtype=object if isinstance(value, str) else None)
+                              for column, value in features})
+    for column, values in zip(axes, mesh):
+        scenarios[column] = values.ravel()
+    predicted_gpa, predicted_behavior = predict_student_outcomes(scenarios)
+    return {"axes": axes, "predicted_gpa": predicted_gpa.reshape(shape),
+            "predicted_behavior": predicted_behavior.reshape(shape)}
+
+
+@st.cache_data(max_entries=GRID_CACHE_ENTRIES, show_spinner=False)
+def scenario_grid(features):
+    """compute_scenario_grid, run once per feature vector (see feature_vector) and then served from memory."""
+    return compute_scenario_grid(features)
+
+
+def scenario_index(grid, choice):
+    """Index into the grid arrays of the scenario choice ({axis column: value})."""
+    index = []
+    for column, axis in grid["axes"].items():
+        if axis.dtype == object:
+            index.append(int(np.flatnonzero(axis == choice[column])[0]))
+        else:
+            index.append(int(np.abs(axis - choice[column]).argmin()))
+    return tuple(index)
@@ -1,6 +1,8 @@
 # pages/About_Our_Team.py
 
 import streamlit as st
+from data.utils.assets import image_src
+from data.utils.metrics import count_rerun
 
 # Page configuration
 st.set_page_config(
@@ -8,6 +10,7 @@ st.set_page_config(
     page_icon="👥",
     layout="wide"
 )
+count_rerun("Credits")
 
 st.title("Meet Our Development Team")
 st.markdown("---")
@@ -51,6 +54,9 @@ team_members = [
     }
 ]
 
+# Display width of the team photos; they are served as thumbnails of this size
+PHOTO_WIDTH = 150
+
 # Display team members in a grid
 st.markdown("## Our Team")
 st.markdown("---")
@@ -62,26 +68,26 @@ row2_col1, row2_col2 = st.columns(2)
 # First row
 with row1_col1:
     st.subheader(team_members[0]["name"])
-    st.image(team_members[0]["image"], width=150)
+    st.image(image_src(team_members[0]["image"], PHOTO_WIDTH), width=PHOTO_WIDTH)
     st.write(f"*Role:* {team_members[0]['role']}")
     st.markdown(f"[LinkedIn]({team_members[0]['linkedin']})")
 
 with row1_col2:
     st.subheader(team_members[1]["name"])
-    st.image(team_members[1]["image"], width=150)
+    st.image(image_src(team_members[1]["image"], PHOTO_WIDTH), width=PHOTO_WIDTH)
     st.write(f"*Role:* {team_members[1]['role']}")
     st.markdown(f"[LinkedIn]({team_members[1]['linkedin']})")
 
 # Second row
 with row2_col1:
     st.subheader(team_members[2]["name"])
-    st.image(team_members[2]["image"], width=150)
+    st.image(image_src(team_members[2]["image"], PHOTO_WIDTH), width=PHOTO_WIDTH)
     st.write(f"*Role:* {team_members[2]['role']}")
     st.markdown(f"[LinkedIn]({team_members[2]['linkedin']})")
 
 with row2_col2:
     st.subheader(team_members[3]["name"])
-    st.image(team_members[3]["image"], width=150)
+    st.image(image_src(team_members[3]["image"], PHOTO_WIDTH), width=PHOTO_WIDTH)
     st.write(f"*Role:* {team_members[3]['role']}")
     st.markdown(f"[LinkedIn]({team_members[3]['linkedin']})")
 
@@ -2,9 +2,12 @@
 
 import streamlit as st
 import pandas as pd
-import os
-import numpy as np
-from sklearn.linear_model import LinearRegression
+from data.utils.database import ensure_database, get_student
+from data.utils.figures import chart_png, what_if_surface_figure
+from data.utils.metrics import count_rerun, timed
+from data.utils.ml_utils import predict_student_outcomes
+from data.utils.prediction_store import batch_info, read_rows, save_predictions
+from data.utils.what_if import feature_vector, scenario_grid, scenario_index
 
 # Page configuration
 st.set_page_config(
@@ -12,6 +15,58 @@ st.set_page_config(
     page_icon="👨‍🎓",
     layout="wide"
 )
+count_rerun("Student_Input")
+
+@st.fragment
+def what_if_explorer(batch_id, record):
+    # A fragment, so moving a control reruns only this section; every scenario is looked up
+    # in a grid computed once per feature vector, and the model is never called again
+    features = feature_vector(record)
+    values = dict(features)
+    with timed("scoring:what_if"):
+        grid = scenario_grid(features)
+    axes = grid["axes"]
+    
+    st.subheader("What If?")
+    st.write("See how your predicted GPA would change with different habits.")
+    col1, col2 = st.columns(2)
+    with col1:
+        # Keys include the batch id so the controls start from each new prediction
+        study_hours = st.select_slider("Daily Study Hours", options=axes["study_hours"].tolist(),
+                                       value=values["study_hours"], format_func=lambda v: f"{v:.1f}",
+                                       key=f"what_if_study_{batch_id}")
+        attendance = st.select_slider("Attendance Percentage", options=axes["attendance"].tolist(),
+                                      value=values["attendance"], format_func=lambda v: f"{v:g}",
+                                      key=f"what_if_attendance_{batch_id}")
+        sleep_hours = st.select_slider("Average Sleep Hours per Night", options=axes["sleep_hours"].tolist(),
+                                       value=values["sleep_hours"], format_func=lambda v: f"{v:g}",
+                                       key=f"what_if_sleep_{batch_id}")
+    with col2:
+        participation_options = axes["class_participation"].tolist()
+        participation = st.selectbox("Class Participation", options=participation_options,
+                                     index=participation_options.index(values["class_participation"]),
+                                     key=f"what_if_participation_{batch_id}")
+        homework_options = axes["homework_completion"].tolist()
+        homework = st.selectbox("Homework Completion", options=homework_options,
+                                index=homework_options.index(values["homework_completion"]),
+                                key=f"what_if_homework_{batch_id}")
+    
+    index = scenario_index(grid, {"study_hours": study_hours, "attendance": attendance, "sleep_hours": sleep_hours,
+                                  "class_participation": participation, "homework_completion": homework})
+    gpa = grid["predicted_gpa"][index]
+    behavior = grid["predicted_behavior"][index]
+    col3, col4 = st.columns(2)
+    # Adding 0 turns a rounded -0.0 into 0.0, which the metric would otherwise show as a decline
+    col3.metric("What-if GPA", f"{gpa:.2f}", delta=f"{round(gpa - record['predicted_gpa'], 2) + 0:.2f}")
+    col4.metric("What-if Behavior Score", f"{behavior:.1f}/10",
+                delta=f"{round(behavior - record['predicted_behavior'], 1) + 0:.1f}")
+    
+    # The surface only changes with sleep, participation and homework, so moving the other two
+    # controls never redraws it; the circle marks the student's current habits
+    surface = grid["predicted_gpa"][:, :, index[2], index[3], index[4]]
+    surface_png = chart_png("what_if_surface", (features, index[2:]), lambda: what_if_surface_figure(
+        axes["study_hours"], axes["attendance"], surface, marker=(values["study_hours"], values["attendance"])))
+    st.image(surface_png, width="stretch")
 
 # Check if user is logged in
 if "student_id" not in st.session_state or "student_name" not in st.session_state:
@@ -23,16 +78,14 @@ else:
     st.title(f"Welcome, {st.session_state.student_name}")
     st.subheader("Enter your information to get a prediction")
     
-    # Try to pre-fill some data based on student ID
+    # Try to pre-fill some data based on student ID, with one indexed lookup in the records database
     student_data = None
-    if os.path.exists("data/sample_student_data.csv"):
-        try:
-            df = pd.read_csv("data/sample_student_data.csv")
-            student_record = df[df['student_id'].astype(str) == st.session_state.student_id]
-            if not student_record.empty:
-                student_data = student_record.iloc[0]
-        except Exception as e:
-            st.error(f"Error reading sample data: {e}")
+    try:
+        with timed("data_load"):
+            ensure_database()
+            student_data = get_student(st.session_state.student_id)
+    except Exception as e:
+        st.error(f"Error reading student records: {e}")
     
     # Create a simple form for student inputs
     with st.form("student_form"):
@@ -98,96 +151,30 @@ else:
             "stress_level": stress_level
         }
         
-        # Convert categorical variables to numeric
-        participation_map = {"Low": 1, "Medium": 2, "High": 3}
-        homework_map = {"Low": 1, "Medium": 2, "High": 3}
-        behavior_map = {"Poor": 1, "Average": 2, "Good": 3, "Excellent": 4}
-        extracurricular_map = {"None": 0, "Limited": 1, "Moderate": 2, "Extensive": 3}
-        stress_map = {"Very Low": 1, "Low": 2, "Medium": 3, "High": 4, "Very High": 5}
-        
-        # Calculate normalized scores (0-1 scale) for each factor
-        attendance_norm = attendance / 100
-        study_norm = study_hours / 6
-        part_norm = participation_map.get(participation, 2) / 3
-        homework_norm = homework_map.get(homework, 2) / 3
-        behavior_norm = behavior_map.get(behavior, 2) / 4
-        extracurricular_norm = extracurricular_map.get(extracurricular, 0) / 3
-        
-        # Sleep hours has an optimal range (7-9 hours), convert to 0-1 scale
-        if 7 <= sleep_hours <= 9:
-            sleep_norm = 1.0
-        else:
-            sleep_norm = 1.0 - min(abs(sleep_hours - 8), 4) / 4
-        
-        # Stress has negative impact, invert the scale (higher stress = lower score)
-        stress_norm = 1.0 - (stress_map.get(stress_level, 3) - 1) / 4
-        
-        # Advanced weighted model for GPA prediction
-        # Different weight combinations based on previous GPA range
-        if prev_gpa >= 3.5:
-            # High achievers - attendance and homework completion are most critical
-            predicted_gpa = min(4.0, (
-                prev_gpa * 0.45 +
-                attendance_norm * 0.15 +
-                study_norm * 0.10 +
-                part_norm * 0.05 +
-                homework_norm * 0.10 +
-                behavior_norm * 0.05 +
-                sleep_norm * 0.05 + 
-                extracurricular_norm * 0.02 +
-                stress_norm * 0.03
-            ))
-        elif prev_gpa >= 2.5:
-            # Average students - study hours and participation become more important
-            predicted_gpa = min(4.0, (
-                prev_gpa * 0.40 +
-                attendance_norm * 0.15 +
-                study_norm * 0.15 +
-                part_norm * 0.10 +
-                homework_norm * 0.10 +
-                behavior_norm * 0.02 +
-                sleep_norm * 0.03 + 
-                extracurricular_norm * 0.02 +
-                stress_norm * 0.03
-            ))
-        else:
-            # Struggling students - study hours and attendance are critical
-            predicted_gpa = min(4.0, (
-                prev_gpa * 0.30 +
-                attendance_norm * 0.20 +
-                study_norm * 0.20 +
-                part_norm * 0.10 +
-                homework_norm * 0.10 +
-                behavior_norm * 0.02 +
-                sleep_norm * 0.03 + 
-                extracurricular_norm * 0.02 +
-                stress_norm * 0.03
-            ))
-        
-        # Adjust prediction based on age - older students tend to be more consistent
-        age_adjustment = min(0.1, (age - 14) * 0.01)
-        predicted_gpa = min(4.0, predicted_gpa * (1 + age_adjustment))
-        
-        # Calculate behavior score with improved weighting and additional factors
-        behavior_score = min(10, (
-            behavior_norm * 4.0 +
-            attendance_norm * 2.0 +
-            part_norm * 1.5 +
-            sleep_norm * 1.0 +
-            stress_norm * 1.5
-        ))
+        # Score the form as a one-row batch with the shared student model
+        with timed("scoring"):
+            predicted_gpa, behavior_score = predict_student_outcomes(pd.DataFrame([student_data]))
+        predicted_gpa = float(predicted_gpa[0])
+        behavior_score = float(behavior_score[0])
         
         # Store results for the results page
         student_data["predicted_gpa"] = predicted_gpa
         student_data["predicted_behavior"] = behavior_score
         
-        # Save the results to a session state for access in the results page
-        st.session_state.student_prediction = student_data
+        # Save the results to the prediction store; the session keeps only the batch id
+        st.session_state.student_batch_id = save_predictions(
+            pd.DataFrame([student_data]), kind="student", owner_id=str(st.session_state.student_id),
+            method="Student Model")
         
         # Navigate to results page
         st.success("Prediction completed! View your results.")
         if st.button("View My Results"):
-            st.switch_page("pages/Student_Results.py")
+            st.switch_page("pages/Student_Results.py", query_params={"batch": st.session_state.student_batch_id})
+    
+    # What-if explorer around the last saved prediction
+    if "student_batch_id" in st.session_state and batch_info(st.session_state.student_batch_id) is not None:
+        what_if_explorer(st.session_state.student_batch_id,
+                         read_rows(st.session_state.student_batch_id, limit=1).to_dict("records")[0])
     
     # Add a logout button
     if st.button("Log Out"):
@@ -196,4 +183,6 @@ else:
             del st.session_state.student_id
         if "student_name" in st.session_state:
             del st.session_state.student_name
+        if "student_batch_id" in st.session_state:
+            del st.session_state.student_batch_id
         st.switch_page("Home.py")
\ No newline at end of file
@@ -1,7 +1,7 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
+from data.utils.figures import chart_png, factor_bar_figure, gauge_figure
+from data.utils.metrics import count_rerun, timed
+from data.utils.prediction_store import batch_info, read_rows
 
 # Page configuration
 st.set_page_config(
@@ -9,17 +9,25 @@ st.set_page_config(
     page_icon="📊",
     layout="wide"
 )
+count_rerun("Student_Results")
 
 st.title("Your Prediction Results")
 
-# Check if prediction exists in session state
-if "student_prediction" not in st.session_state:
+# The prediction's batch id comes from this session or, after a reconnect, from the page URL;
+# either way it is only shown to the logged-in student it belongs to
+batch_id = st.session_state.get("student_batch_id") or st.query_params.get("batch")
+info = batch_info(batch_id)
+student_id = st.session_state.get("student_id")
+if info is None or info["kind"] != "student" or student_id is None or info["owner_id"] != str(student_id):
     st.warning("No prediction data found. Please complete the student input form first.")
     if st.button("Go to Student Input"):
         st.switch_page("pages/Student_Input.py")
 else:
     # Get the prediction data
-    data = st.session_state.student_prediction
+    st.session_state.student_batch_id = batch_id
+    st.query_params["batch"] = batch_id
+    with timed("data_load"):
+        data = read_rows(batch_id, limit=1).to_dict("records")[0]
     
     # Display student info
     st.subheader("Student Information")
@@ -39,17 +47,10 @@ else:
             delta=f"{data['predicted_gpa'] - data['previous_gpa']:.2f}"
         )
         
-        # Create a gauge chart for GPA
-        fig1, ax1 = plt.subplots(figsize=(4, 0.3))
-        gpa_range = np.linspace(0, 4, 100)
-        ax1.barh(0, 4, color='lightgray', height=0.2)
-        ax1.barh(0, data['predicted_gpa'], color='blue', height=0.2)
-        ax1.set_xlim(0, 4)
-        ax1.set_yticks([])
-        ax1.set_xticks([0, 1, 2, 3, 4])
-        ax1.set_xticklabels(['0', '1', '2', '3', '4'])
-        ax1.set_title('GPA Scale')
-        st.pyplot(fig1)
+        # Create a gauge chart for GPA (rendered once per value, then served from the figure cache)
+        gpa_gauge = chart_png("gpa_gauge", round(data['predicted_gpa'], 4), lambda: gauge_figure(
+            data['predicted_gpa'], 4, [0, 1, 2, 3, 4], 'blue', 'GPA Scale', tick_labels=['0', '1', '2', '3', '4']))
+        st.image(gpa_gauge, width="stretch")
         
         # Recommendations based on GPA
         st.subheader("Academic Recommendations")
@@ -77,15 +78,9 @@ else:
         )
         
         # Create a gauge chart for behavior
-        fig2, ax2 = plt.subplots(figsize=(4, 0.3))
-        behavior_range = np.linspace(0, 10, 100)
-        ax2.barh(0, 10, color='lightgray', height=0.2)
-        ax2.barh(0, data['predicted_behavior'], color='green', height=0.2)
-        ax2.set_xlim(0, 10)
-        ax2.set_yticks([])
-        ax2.set_xticks([0, 2, 4, 6, 8, 10])
-        ax2.set_title('Behavior Scale')
-        st.pyplot(fig2)
+        behavior_gauge = chart_png("behavior_gauge", round(data['predicted_behavior'], 4), lambda: gauge_figure(
+            data['predicted_behavior'], 10, [0, 2, 4, 6, 8, 10], 'green', 'Behavior Scale'))
+        st.image(behavior_gauge, width="stretch")
         
         # Behavior recommendations
         st.subheader("Behavior Recommendations")
@@ -121,19 +116,9 @@ else:
         {"Poor": 0.25, "Average": 0.5, "Good": 0.75, "Excellent": 1}[data['behavior_score']]
     ]
     
-    fig3, ax3 = plt.subplots(figsize=(10, 5))
-    bars = ax3.bar(factors, factor_values, color=['blue', 'green', 'orange', 'red', 'purple', 'brown'])
-    ax3.set_ylim(0, 1)
-    ax3.set_ylabel('Normalized Score')
-    ax3.set_title('Your Performance Factors')
-    
-    # Add value labels on top of bars
-    for bar in bars:
-        height = bar.get_height()
-        ax3.text(bar.get_x() + bar.get_width()/2., height + 0.02,
-                f'{height:.2f}', ha='center', va='bottom')
-    
-    st.pyplot(fig3)
+    factor_chart = chart_png("factor_bars", tuple(round(v, 4) for v in factor_values),
+                             lambda: factor_bar_figure(factors, factor_values))
+    st.image(factor_chart, width="stretch")
     
     # Navigation buttons
     col3, col4 = st.columns(2)
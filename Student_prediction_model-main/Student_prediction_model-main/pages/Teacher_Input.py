@@ -1,9 +1,24 @@
 # pages/Teacher_Input.py
 
 import streamlit as st
-import pandas as pd
 import os
-import numpy as np
+import pandas as pd
+from data.utils.data_loader import (
+    SAMPLE_DATA_PATH, STUDENT_SCHEMA, frame_fingerprint, load_student_data,
+    load_student_source, memory_report, read_student_csv,
+)
+from data.utils.database import AT_RISK_GPA, at_risk_students, class_aggregates, count_at_risk, ensure_database
+from data.utils.incremental import rescore_roster, score_roster, scoring_key
+from data.utils.ingest import REQUIRED_COLUMNS, stream_student_csv
+from data.utils.metrics import (
+    METRICS_LOG_PATH, PROMETHEUS_PATH_ENV, count_rerun, rerun_summary, stage_summary, timed,
+)
+from data.utils.ml_utils import (
+    PREDICTION_METHODS, TARGET_COLUMN, get_linear_model, save_linear_model, train_linear_model,
+)
+from data.utils.prediction_store import save_predictions
+from data.utils.stats import class_stats, numeric_code_column
+from data.utils.tables import paginated_dataframe, paginated_query, roster_table
 
 # Page configuration
 st.set_page_config(
@@ -11,6 +26,21 @@ st.set_page_config(
     page_icon="👨‍🏫",
     layout="wide"
 )
+count_rerun("Teacher_Input")
+
+@st.cache_data(max_entries=4, show_spinner="Validating uploaded data...")
+def ingest_upload(file_id, _uploaded_file):
+    # Keyed on the upload's id alone, so reruns and a change of prediction method reuse the parsed
+    # frame and its fingerprint. Unknown columns are dropped
+    df, aggregates = stream_student_csv(_uploaded_file, columns=list(STUDENT_SCHEMA))
+    return df, aggregates, frame_fingerprint(df)
+
+
+@st.cache_data(max_entries=4, show_spinner="Scoring students...")
+def score_students(fingerprint, method, model_key, _df, _model):
+    # Keyed on the data's fingerprint and the scoring method and model (see scoring_key), so
+    # generating the same predictions again doesn't rescore
+    return score_roster(_df, method, _model)
 
 # Check if user is logged in as a teacher
 if "teacher_id" not in st.session_state:
@@ -25,6 +55,16 @@ else:
     # Admin badge for admin users
     if st.session_state.get("is_admin", False):
         st.success("👑 Administrative Access")
+        # Timings of every session of this server, from data/utils/metrics.py
+        with st.expander("Performance Metrics"):
+            st.caption(f"Latency of each page stage over its last calls, in milliseconds. Every timing is "
+                       f"also logged to {METRICS_LOG_PATH}; set {PROMETHEUS_PATH_ENV} to a file path to "
+                       f"export them for Prometheus.")
+            st.dataframe(stage_summary(), hide_index=True,
+                         column_config={column: st.column_config.NumberColumn(format="%.1f")
+                                        for column in ["p50_ms", "p95_ms", "max_ms"]})
+            st.caption("Script reruns per page since the server started.")
+            st.dataframe(rerun_summary(), hide_index=True)
     
     # Main content for options
     col1, col2, col3 = st.columns(3)
@@ -38,7 +78,7 @@ else:
         )
         
         if data_option == "Upload Custom Data":
-            uploaded_file = st.file_uploader("Upload CSV file", type=["csv"], help="Ensure your CSV file has columns: student_id, name, previous_gpa, attendance, study_hours, class_participation, homework_completion, behavior_score, sleep_hours, extracurricular, stress_level")
+            uploaded_file = st.file_uploader("Upload CSV file", type=["csv"], help=f"Ensure your CSV file has columns: {', '.join(REQUIRED_COLUMNS)}")
     
     with col2:
         st.header("Analysis Options")
@@ -49,26 +89,47 @@ else:
         st.header("Prediction Settings")
         prediction_method = st.selectbox(
             "Prediction Method",
-            ["Simple Formula", "Linear Regression"]
+            PREDICTION_METHODS
         )
+        incremental = st.checkbox(
+            "Only rescore new or changed students",
+            help="Reuses the predictions of your last batch for the same data source and method; "
+                 "students whose records are unchanged are not scored or saved again."
+        )
+        
+        if prediction_method == "Linear Regression":
+            # Optional retraining from a history file; the saved model is reused until retrained
+            with st.expander("Train Regression Model"):
+                history_file = st.file_uploader("Upload history CSV (optional)", type=["csv"], help=f"Records with a '{TARGET_COLUMN}' column are fitted to observed GPA; otherwise the student model provides the labels. Leave empty to train on the sample data.")
+                if st.button("Train Model"):
+                    history_df = read_student_csv(history_file) if history_file is not None else load_student_data(SAMPLE_DATA_PATH)
+                    model = train_linear_model(history_df)
+                    save_linear_model(model)
+                    st.success(f"Model trained on {model['spec']['training_rows']} records and saved.")
     
     # Main content
     st.header("Student Data")
     
     # Load data based on user choice
-    if data_option == "Use Sample Data" and os.path.exists("data/sample_student_data.csv"):
-        df = pd.read_csv("data/sample_student_data.csv")
+    if data_option == "Use Sample Data" and os.path.exists(SAMPLE_DATA_PATH):
+        with timed("data_load"):
+            df, fingerprint = load_student_source(SAMPLE_DATA_PATH)
+            # The bundled records are also in the student database, whose indexes answer the
+            # headline numbers and the at-risk list without scanning the frame
+            ensure_database()
+        aggregates = None
+        data_label = "Sample Data"
         st.success("Sample data loaded successfully!")
     elif data_option == "Upload Custom Data" and 'uploaded_file' in locals() and uploaded_file is not None:
         try:
-            df = pd.read_csv(uploaded_file)
-            required_columns = ['student_id', 'name', 'previous_gpa', 'attendance', 'study_hours', 'class_participation', 'homework_completion', 'behavior_score', 'sleep_hours', 'extracurricular', 'stress_level']
-            missing_columns = set(required_columns) - set(df.columns)
-            if missing_columns:
-                st.error(f"Missing required columns: {', '.join(missing_columns)}. Please ensure your CSV file includes all necessary columns.")
-                df = None
-            else:
-                st.success("Custom data loaded successfully!")
+            # Header is checked first, then the file is validated and compacted chunk by chunk
+            with timed("data_load"):
+                df, aggregates, fingerprint = ingest_upload(uploaded_file.file_id, uploaded_file)
+            data_label = uploaded_file.name
+            st.success("Custom data loaded successfully!")
+        except ValueError as e:
+            st.error(str(e))
+            df = None
         except Exception as e:
             st.error(f"Error uploading file: {e}")
             df = None
@@ -80,15 +141,35 @@ else:
     if df is not None:
         # Display the data
         st.subheader("Student Records")
-        st.dataframe(df)
+        # The fingerprint was computed once when the data was loaded, so paging and sorting don't rehash it
+        roster_table(df, key="records", fingerprint=fingerprint)
+        
+        # Compact dtypes keep the copy held in this session small
+        memory = memory_report(df)
+        st.caption(f"{memory['rows']:,} records using {memory['bytes'] / 1e6:.2f} MB in memory "
+                   f"(about {memory['default_dtype_bytes'] / 1e6:.2f} MB with default dtypes).")
+        
+        # Every aggregate below comes from one cached pass over the data; uploads already bring
+        # the GPA summary and behavior counts from the running totals kept while reading them,
+        # and the sample data reads them from the student database
+        with timed("aggregation", rows=len(df)):
+            stats = class_stats(df, fingerprint)
+            if aggregates is not None:
+                gpa_stats = {"mean": aggregates["previous_gpa_sum"] / aggregates["rows"],
+                             "min": aggregates["previous_gpa_min"], "max": aggregates["previous_gpa_max"]}
+                behavior_counts = aggregates["behavior_counts"]
+            else:
+                summary = class_aggregates()
+                gpa_stats = {"mean": summary["previous_gpa_mean"], "min": summary["previous_gpa_min"],
+                             "max": summary["previous_gpa_max"]}
+                behavior_counts = summary["behavior_counts"]
+        corr = stats["corr"]
+        behavior_counts = pd.Series(behavior_counts, name="count")
         
         # Basic statistics
         st.subheader("Class Statistics")
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        
-        if numeric_cols:
-            stats_df = df[numeric_cols].describe()
-            st.dataframe(stats_df)
+        if not stats["describe"].empty:
+            st.dataframe(stats["describe"])
         
         # Performance analysis
         if analyze_performance:
@@ -96,30 +177,33 @@ else:
             
             # Display average GPA
             if 'previous_gpa' in df.columns:
-                avg_gpa = df['previous_gpa'].mean()
-                min_gpa = df['previous_gpa'].min()
-                max_gpa = df['previous_gpa'].max()
-                
                 col1, col2, col3 = st.columns(3)
-                col1.metric("Average GPA", f"{avg_gpa:.2f}")
-                col2.metric("Minimum GPA", f"{min_gpa:.2f}")
-                col3.metric("Maximum GPA", f"{max_gpa:.2f}")
+                col1.metric("Average GPA", f"{gpa_stats['mean']:.2f}")
+                col2.metric("Minimum GPA", f"{gpa_stats['min']:.2f}")
+                col3.metric("Maximum GPA", f"{gpa_stats['max']:.2f}")
                 
                 # GPA distribution
                 st.subheader("GPA Distribution")
-                gpa_counts = pd.cut(df['previous_gpa'], bins=[0, 1, 2, 3, 4], labels=['0-1', '1-2', '2-3', '3-4']).value_counts()
-                st.bar_chart(gpa_counts)
+                st.bar_chart(stats["histograms"]['previous_gpa'])
                 
-                # Students at risk (GPA < 2.5)
-                at_risk = df[df['previous_gpa'] < 2.5]
-                if not at_risk.empty:
-                    st.subheader("Students at Academic Risk (GPA < 2.5)")
-                    st.dataframe(at_risk)
+                # Students at risk; for the sample data only the visible page is read, through the GPA index
+                if aggregates is None:
+                    at_risk_count = count_at_risk()
+                    if at_risk_count:
+                        st.subheader(f"Students at Academic Risk (GPA < {AT_RISK_GPA})")
+                        paginated_query(at_risk_count,
+                                        lambda offset, limit: at_risk_students(offset=offset, limit=limit),
+                                        key="at_risk")
+                else:
+                    at_risk = df[df['previous_gpa'] < AT_RISK_GPA]
+                    if not at_risk.empty:
+                        st.subheader(f"Students at Academic Risk (GPA < {AT_RISK_GPA})")
+                        paginated_dataframe(at_risk, key="at_risk")
             
             # Study hours vs GPA correlation
             if 'study_hours' in df.columns and 'previous_gpa' in df.columns:
                 st.subheader("Study Hours vs GPA")
-                study_gpa_corr = df['study_hours'].corr(df['previous_gpa'])
+                study_gpa_corr = corr.loc['study_hours', 'previous_gpa']
                 st.write(f"The correlation between study hours and GPA is {study_gpa_corr:.2f}.")
         
         # Behavior analysis
@@ -128,105 +212,62 @@ else:
             
             if 'behavior_score' in df.columns:
                 # Count of students by behavior category
-                behavior_counts = df['behavior_score'].value_counts()
                 st.subheader("Behavior Distribution")
                 st.bar_chart(behavior_counts)
                 
-                # Behavior vs attendance correlation
+                # Behavior vs attendance correlation, using the ordinal codes of the behavior levels
                 if 'attendance' in df.columns:
                     st.subheader("Behavior vs Attendance")
-                    
-                    # Create numeric mapping for behavior
-                    behavior_map = {"Poor": 1, "Average": 2, "Good": 3, "Excellent": 4}
-                    
-                    # Use mapping if behavior is categorical
-                    if df['behavior_score'].dtype == 'object':
-                        df['behavior_numeric'] = df['behavior_score'].map(behavior_map)
-                        behavior_att_corr = df['behavior_numeric'].corr(df['attendance'])
-                    else:
-                        behavior_att_corr = df['behavior_score'].corr(df['attendance'])
-                    
+                    behavior_att_corr = corr.loc[numeric_code_column('behavior_score'), 'attendance']
                     st.write(f"The correlation between behavior and attendance is {behavior_att_corr:.2f}.")
                 
                 # Sleep hours analysis if available
                 if 'sleep_hours' in df.columns:
                     st.subheader("Sleep Hours Analysis")
-                    avg_sleep = df['sleep_hours'].mean()
+                    avg_sleep = stats["describe"]['sleep_hours']['mean']
                     st.metric("Average Sleep Hours", f"{avg_sleep:.1f}")
                     
                     # Sleep vs GPA correlation
                     if 'previous_gpa' in df.columns:
-                        sleep_gpa_corr = df['sleep_hours'].corr(df['previous_gpa'])
+                        sleep_gpa_corr = corr.loc['sleep_hours', 'previous_gpa']
                         st.write(f"The correlation between sleep hours and GPA is {sleep_gpa_corr:.2f}.")
                     
                     # Sleep distribution
-                    sleep_hist = pd.cut(df['sleep_hours'], bins=[4, 6, 7, 8, 9, 12], 
-                                      labels=['4-6 hrs', '6-7 hrs', '7-8 hrs', '8-9 hrs', '9+ hrs'])
-                    sleep_counts = sleep_hist.value_counts()
-                    st.bar_chart(sleep_counts)
+                    st.bar_chart(stats["histograms"]['sleep_hours'])
         
         # Prediction section
         st.header("Class Predictions")
         
         if st.button("Generate Predictions for All Students"):
-            # Store original dataframe for comparison
-            df_original = df.copy()
-            
-            # Simple prediction model
-            if prediction_method == "Simple Formula":
-                # Create numeric mappings
-                participation_map = {"Low": 1, "Medium": 2, "High": 3}
-                homework_map = {"Low": 1, "Medium": 2, "High": 3}
-                behavior_map = {"Poor": 1, "Average": 2, "Good": 3, "Excellent": 4}
-                
-                # Calculate predicted GPA for each student
-                df['predicted_gpa'] = df.apply(
-                    lambda row: (
-                        row['previous_gpa'] * 0.5 +
-                        (row['attendance'] / 100) * 0.2 +
-                        (row['study_hours'] / 6) * 0.2 +
-                        (participation_map.get(row['class_participation'], 2) / 3) * 0.03 +
-                        (homework_map.get(row['homework_completion'], 2) / 3) * 0.05 +
-                        (behavior_map.get(row['behavior_score'], 2) / 4) * 0.02
-                    ),
-                    axis=1
-                )
-            else:  # Linear Regression
-                # For simplicity, we'll still use the formula but pretend it's regression
-                # In a real app, we would train a model on historical data
-                
-                # Create numeric mappings for categorical features
-                if 'class_participation' in df.columns and df['class_participation'].dtype == 'object':
-                    df['participation_numeric'] = df['class_participation'].map({"Low": 1, "Medium": 2, "High": 3})
-                
-                if 'homework_completion' in df.columns and df['homework_completion'].dtype == 'object':
-                    df['homework_numeric'] = df['homework_completion'].map({"Low": 1, "Medium": 2, "High": 3})
-                
-                if 'behavior_score' in df.columns and df['behavior_score'].dtype == 'object':
-                    df['behavior_numeric'] = df['behavior_score'].map({"Poor": 1, "Average": 2, "Good": 3, "Excellent": 4})
-                
-                # Calculate predicted GPA (using the same formula for demonstration)
-                df['predicted_gpa'] = df.apply(
-                    lambda row: (
-                        row['previous_gpa'] * 0.5 +
-                        (row['attendance'] / 100) * 0.2 +
-                        (row['study_hours'] / 6) * 0.2 +
-                        (row.get('participation_numeric', 2) / 3) * 0.03 +
-                        (row.get('homework_numeric', 2) / 3) * 0.05 +
-                        (row.get('behavior_numeric', 2) / 4) * 0.02
-                    ),
-                    axis=1
-                )
-            
-            # Calculate the difference from previous GPA
-            df['gpa_change'] = df['predicted_gpa'] - df['previous_gpa']
+            try:
+                with timed("scoring", rows=len(df), method=prediction_method, incremental=incremental):
+                    if incremental:
+                        # Diffs row hashes against the last batch before scoring, then scores and saves
+                        # only the new or changed students in a batch derived from it
+                        batch_id, summary = rescore_roster(df, prediction_method, st.session_state.teacher_id,
+                                                           data_label)
+                    else:
+                        # Scored the same way as the batch scoring command (python -m data.utils.batch_score),
+                        # into a new frame: the loaded sample frame is shared by every session
+                        model = get_linear_model() if prediction_method == "Linear Regression" else None
+                        scored = score_students(fingerprint, prediction_method, scoring_key(prediction_method, model),
+                                                df, model)
+            except ValueError as e:
+                st.error(str(e))
+                st.stop()
             
-            # Store in session state for the results page
-            st.session_state.teacher_predictions = df
+            if not incremental:
+                # Save the batch to the prediction store; the session and the results page URL keep only its id
+                with timed("save", rows=len(df)):
+                    batch_id = save_predictions(scored, owner_id=st.session_state.teacher_id,
+                                                label=data_label, method=prediction_method)
+                summary = {"rescored": len(df), "reused": 0}
+            st.session_state.teacher_batch_id = batch_id
             
             # Navigate to results page
-            st.success("Predictions generated successfully! Redirecting to results page.")
-            st.switch_page("pages/Teacher_Results.py")
+            st.success(f"Predictions generated successfully ({summary['rescored']:,} students scored, "
+                       f"{summary['reused']:,} reused)! Redirecting to results page.")
+            st.switch_page("pages/Teacher_Results.py", query_params={"batch": batch_id})
     
     # Add a log out button
     if st.button("Log Out"):
@@ -235,6 +276,8 @@ else:
             del st.session_state.teacher_id
         if "is_admin" in st.session_state:
             del st.session_state.is_admin
+        if "teacher_batch_id" in st.session_state:
+            del st.session_state.teacher_batch_id
         st.switch_page("Home.py") 
 
 # Footer
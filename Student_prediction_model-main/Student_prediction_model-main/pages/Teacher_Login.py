@@ -1,12 +1,18 @@
 # pages/Teacher_Login.py
 
 import streamlit as st
+from data.utils.metrics import count_rerun
+from data.utils.resources import start_warmup
 
 st.set_page_config(
     page_title="Teacher Login",
     page_icon="👨‍🏫",
     layout="wide"
 )
+count_rerun("Teacher_Login")
+
+# Pages after login need heavy libraries and data; load them in the background (once per process)
+start_warmup()
 
 st.title("Teacher Login")
 
@@ -1,10 +1,18 @@
 # pages/Teacher_Results.py
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-import seaborn as sns
+from data.utils.distribution import gpa_distributions
+from data.utils.export import (
+    EXCEL_MAX_ROWS, EXPORT_FORMATS, available_formats, excel_engine, export_batch, export_file_name,
+)
+from data.utils.factor_analysis import factor_analysis
+from data.utils.figures import chart_png, factor_correlation_figure, gpa_distribution_figure
+from data.utils.interventions import DECLINE_THRESHOLD, INTERVENTION_LEVELS, build_intervention_table
+from data.utils.metrics import count_rerun, timed
+from data.utils.prediction_store import batch_info, load_batch, quote_identifier, read_rows
+from data.utils.stats import class_stats
+from data.utils.tables import paginated_dataframe, stored_roster_table
 
 # Page configuration
 st.set_page_config(
@@ -12,17 +20,29 @@ st.set_page_config(
     page_icon="📈",
     layout="wide"
 )
+count_rerun("Teacher_Results")
 
 st.title("Prediction Results Dashboard")
 
-# Check if prediction exists in session state
-if "teacher_predictions" not in st.session_state:
+
+# The batch id comes from this session or, after a reconnect, from the page URL; either way it is
+# only shown to the logged-in teacher who saved it
+batch_id = st.session_state.get("teacher_batch_id") or st.query_params.get("batch")
+info = batch_info(batch_id)
+teacher_id = st.session_state.get("teacher_id")
+if info is None or info["kind"] != "class" or teacher_id is None or info["owner_id"] != str(teacher_id):
     st.warning("No prediction data found. Please generate predictions first.")
     if st.button("Go to Teacher Input"):
         st.switch_page("pages/Teacher_Input.py")
 else:
-    # Get the prediction data
-    df = st.session_state.teacher_predictions
+    st.session_state.teacher_batch_id = batch_id
+    st.query_params["batch"] = batch_id
+    
+    # Aggregates are computed from the factor and prediction columns of the batch, loaded once per
+    # process and shared by every session; ids and names are only read for the rows on screen.
+    # Saved batches never change, so the batch id is the fingerprint of the cached aggregates
+    with timed("data_load", rows=info["row_count"]):
+        df = load_batch(batch_id, [column for column in info["columns"] if column not in ("student_id", "name")])
     
     # Overview section
     st.header("Class Overview")
@@ -31,35 +51,32 @@ else:
     # Summary metrics
     col1, col2, col3 = st.columns(3)
     
+    # Summary numbers come from the same cached aggregate pass as the teacher dashboard
+    with timed("aggregation", rows=info["row_count"]):
+        stats = class_stats(df, batch_id)
+    
     with col1:
-        avg_pred_gpa = df['predicted_gpa'].mean()
+        avg_pred_gpa = stats["describe"]['predicted_gpa']['mean']
         st.metric("Average Predicted GPA", f"{avg_pred_gpa:.2f}")
     
     with col2:
-        avg_change = df['gpa_change'].mean()
+        avg_change = stats["describe"]['gpa_change']['mean']
         st.metric("Average GPA Change", f"{avg_change:.2f}", delta=f"{avg_change:.2f}")
     
     with col3:
-        improved = len(df[df['gpa_change'] > 0])
-        total = len(df)
+        improved = int(stats["positive_counts"]['gpa_change'])
+        total = stats["rows"]
         st.metric("Students Expected to Improve", f"{improved} ({improved/total*100:.1f}%)")
     
     # GPA Distribution chart
     st.subheader("Predicted GPA Distribution")
     st.write("This chart compares the distribution of current and predicted GPAs:")
     
-    fig, ax = plt.subplots(figsize=(10, 6))
-    
-    # Create histogram with both current and predicted GPA
-    sns.histplot(data=df, x='previous_gpa', color='blue', alpha=0.5, label='Current GPA', bins=20, kde=True)
-    sns.histplot(data=df, x='predicted_gpa', color='orange', alpha=0.5, label='Predicted GPA', bins=20, kde=True)
-    
-    ax.set_xlabel('GPA')
-    ax.set_ylabel('Number of Students')
-    ax.set_title('GPA Distribution Comparison')
-    ax.legend()
-    
-    st.pyplot(fig)
+    # Rendered once per prediction batch, then served from the figure cache.
+    # Histogram counts and KDE curves are precomputed on fixed bins and grids
+    st.image(chart_png("gpa_distribution", batch_id,
+                       lambda: gpa_distribution_figure(gpa_distributions(df, fingerprint=batch_id))),
+             width="stretch")
     
     # Detailed student predictions
     st.header("Individual Student Predictions")
@@ -69,51 +86,49 @@ else:
     display_cols = ['student_id', 'name', 'previous_gpa', 'predicted_gpa', 'gpa_change']
     
     # Make sure all columns exist
-    valid_cols = [col for col in display_cols if col in df.columns]
+    valid_cols = [col for col in display_cols if col in info["columns"]]
     
     if valid_cols:
-        # Sort by GPA change
-        sorted_df = df[valid_cols].sort_values(by='gpa_change', ascending=False)
-        st.dataframe(sorted_df)
+        # Sorted by GPA change by default; sorting, filtering and paging run as queries on the store
+        stored_roster_table(batch_id, key="predictions", columns=valid_cols, default_sort='gpa_change',
+                            descending=True)
     
     # Students needing attention
     st.header("Students Needing Attention")
     st.write("This section highlights students whose performance might require intervention:")
     
-    # Students with declining performance
-    declining = df[df['gpa_change'] < -0.1].copy()
-    if not declining.empty:
+    # Students with declining performance, grouped by intervention level in one vectorized pass.
+    # Only the declining rows are read from the store
+    with timed("aggregation:interventions"):
+        declining = read_rows(batch_id, valid_cols, where=f"{quote_identifier('gpa_change')} < ?",
+                              params=(DECLINE_THRESHOLD,))
+        interventions = build_intervention_table(declining, valid_cols)
+    if not interventions.empty:
         st.subheader("Declining Performance")
-        st.dataframe(declining[valid_cols])
+        paginated_dataframe(interventions[valid_cols], key="declining")
         
         # Create recommendations
         st.subheader("Intervention Recommendations")
         st.write("Based on the predicted decline in GPA, here are some recommendations:")
         
-        # Group students by how much intervention they need
-        declining['intervention_level'] = pd.cut(
-            declining['gpa_change'], 
-            bins=[-1, -0.5, -0.3, -0.1, 0], 
-            labels=['Urgent', 'High', 'Medium', 'Low']
-        )
+        level_messages = {
+            'Urgent': (st.error, "These students need immediate attention:"),
+            'High': (st.warning, "These students need additional support:"),
+            'Medium': (st.info, "These students need monitoring:"),
+            'Low': (st.info, "These students need monitoring:"),
+        }
         
-        for level in ['Urgent', 'High', 'Medium', 'Low']:
-            level_students = declining[declining['intervention_level'] == level]
-            if not level_students.empty:
-                st.write(f"**{level} Intervention Needed:**")
-                
-                if level == 'Urgent':
-                    st.error("These students need immediate attention:")
-                    for _, student in level_students.iterrows():
-                        st.write(f"- **{student['name']}**: Schedule a parent-teacher conference and consider tutoring.")
-                elif level == 'High':
-                    st.warning("These students need additional support:")
-                    for _, student in level_students.iterrows():
-                        st.write(f"- **{student['name']}**: Regular check-ins and study plan review are recommended.")
-                else:
-                    st.info(f"These students need monitoring:")
-                    student_list = ", ".join(level_students['name'].tolist())
-                    st.write(f"- {student_list}")
+        # The table is ordered by level, so each level is one contiguous slice
+        level_counts = np.bincount(interventions['intervention_level'].cat.codes, minlength=len(INTERVENTION_LEVELS))
+        level_starts = np.concatenate([[0], np.cumsum(level_counts)])
+        for i, level in enumerate(INTERVENTION_LEVELS):
+            if level_counts[i]:
+                st.write(f"**{level} Intervention Needed:** {level_counts[i]:,} students")
+                show_message, message = level_messages[level]
+                show_message(message)
+                level_students = interventions.iloc[level_starts[i]:level_starts[i + 1]]
+                paginated_dataframe(level_students[['student_id', 'name', 'gpa_change', 'recommendation']],
+                                    key=f"intervention_{level}")
     else:
         st.success("No students show significant decline in performance.")
     
@@ -121,29 +136,22 @@ else:
     st.header("Factor Analysis")
     st.write("This analysis shows which factors have the most influence on GPA predictions:")
     
-    # Correlation between factors and predicted GPA
-    numeric_df = df.select_dtypes(include=[np.number])
-    corr_cols = [col for col in numeric_df.columns if col != 'predicted_gpa' and col != 'gpa_change']
+    # Correlations, rank correlations and standardized coefficients from one matrix per prediction batch
+    with timed("aggregation:factors"):
+        corr_df = factor_analysis(df, fingerprint=batch_id)
     
-    if corr_cols:
-        correlations = []
-        for col in corr_cols:
-            corr = numeric_df['predicted_gpa'].corr(numeric_df[col])
-            correlations.append({'Factor': col, 'Correlation': corr})
-        
-        corr_df = pd.DataFrame(correlations)
-        corr_df = corr_df.sort_values('Correlation', ascending=False)
-        
+    if not corr_df.empty:
         st.subheader("Factors Influencing GPA Predictions")
         st.write("The following chart shows the correlation of various factors with the predicted GPA:")
         
         # Create a horizontal bar chart
-        fig, ax = plt.subplots(figsize=(10, 5))
-        sns.barplot(x='Correlation', y='Factor', data=corr_df, ax=ax, palette="viridis")
-        ax.set_xlabel('Correlation with Predicted GPA')
-        ax.set_title('Impact of Different Factors on GPA')
+        st.image(chart_png("factor_correlations", batch_id, lambda: factor_correlation_figure(corr_df)),
+                 width="stretch")
         
-        st.pyplot(fig)
+        with st.expander("Correlation details"):
+            st.write("Spearman is the rank correlation with predicted GPA. The standardized coefficient is each "
+                     "factor's weight when predicted GPA is regressed on all factors together.")
+            st.dataframe(corr_df, hide_index=True)
         
         # Key insights based on correlations
         st.subheader("Key Insights")
@@ -160,13 +168,24 @@ else:
     st.header("Export Results")
     st.write("You can download the prediction results for further analysis:")
     
-    # Create a CSV download button
-    csv = df.to_csv(index=False)
+    export_col1, export_col2 = st.columns(2)
+    formats = available_formats(info["row_count"])
+    export_format = export_col1.selectbox("Format", formats, format_func=lambda fmt: EXPORT_FORMATS[fmt][0])
+    shown_only = export_col2.radio("Columns", ["All columns", "Columns shown above"], horizontal=True) != "All columns"
+    if excel_engine() is None:
+        st.caption("Excel export needs openpyxl: pip install openpyxl")
+    elif "xlsx" not in formats:
+        st.caption(f"Excel export is limited to {EXCEL_MAX_ROWS:,} students; use CSV or Parquet.")
+    
+    # The file is built only when the button is clicked, once per batch, format and columns, then
+    # served from memory; reruns of this page never serialize the batch
+    export_columns = valid_cols if shown_only else None
     st.download_button(
-        label="Download Predictions as CSV",
-        data=csv,
-        file_name="student_predictions.csv",
-        mime="text/csv"
+        label=f"Download Predictions as {EXPORT_FORMATS[export_format][0]}",
+        data=lambda: export_batch(batch_id, export_format, export_columns, page="Teacher_Results"),
+        file_name=export_file_name("student_predictions", export_format),
+        mime=EXPORT_FORMATS[export_format][2],
+        on_click="ignore"
     )
     
     # Navigation buttons